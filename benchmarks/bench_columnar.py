@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+bench_columnar.py
+─────────────────
+File size and load time of the intermediates as CSV/GeoJSON against
+Parquet/GeoParquet, full reads and column-projected reads, with the real
+data/ files tiled (with perturbed copies) up to larger row counts.
+
+USAGE (from project root)
+  python benchmarks/bench_columnar.py [--scales 1 10 100]
+requires: pandas, pyarrow, geopandas
+"""
+import argparse, pathlib, sys, tempfile, time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "scripts"))
+from columnar import read_layer, read_table, write_layer, write_table   # noqa: E402
+
+# name → (source file, schema for tables / None for a layer, projected columns)
+DATASETS = {
+    "blm_projects": ("data/outputs/blm_projects_with_coords.csv", "blm_projects",
+                     ["NEPA #", "Latitude", "Longitude"]),
+    "fr_notices": ("data/processed/usfs_comments_with_coords.csv", "fr_notices",
+                   ["admin unit", "title", "days_left"]),
+    "forests": ("data/outputs/usfs_selected_forests.geojson", None, ["FORESTNAME"]),
+}
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def scaled(df, factor):
+    """`factor` copies of df, each perturbed so compression can't just dedupe them"""
+    import pandas as pd
+
+    copies = [df]
+    for k in range(1, factor):
+        c = df.copy()
+        if hasattr(c, "geometry"):
+            c["geometry"] = c.geometry.translate(k * 1e-3, k * 1e-3)
+        for col in c.columns:
+            if c[col].dtype == "float64":
+                c[col] = c[col] + k * 1e-6
+            elif isinstance(c[col].dtype, pd.StringDtype):
+                c[col] = c[col] + f"-{k}"
+        copies.append(c)
+    return pd.concat(copies, ignore_index=True) if factor > 1 else df
+
+
+def bench(name, factor, tmp):
+    src, schema, cols = DATASETS[name]
+    if schema is None:
+        data = scaled(read_layer(src), factor)
+        text, col = tmp / f"{name}.geojson", tmp / f"{name}.parquet"
+        write_layer(data, text)
+        write_layer(data, col)
+        loads = {
+            "text": lambda: read_layer(text),
+            "columnar": lambda: read_layer(col),
+            "columnar, projected": lambda: read_layer(col, columns=cols),
+        }
+    else:
+        data = scaled(read_table(src, schema=schema), factor)
+        text, col = tmp / f"{name}.csv", tmp / f"{name}.parquet"
+        write_table(data, text, schema)
+        write_table(data, col, schema)
+        loads = {
+            "text": lambda: read_table(text, schema=schema),
+            "columnar": lambda: read_table(col),
+            "columnar, projected": lambda: read_table(col, columns=cols),
+        }
+    sizes = {"text": text.stat().st_size, "columnar": col.stat().st_size}
+    times = {k: timed(fn) for k, fn in loads.items()}
+    return len(data), sizes, times
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    ap.add_argument("--datasets", nargs="+", choices=list(DATASETS), default=list(DATASETS))
+    args = ap.parse_args()
+
+    print(f"{'dataset':>12} {'rows':>8} {'text MB':>8} {'pq MB':>7} "
+          f"{'text ms':>8} {'pq ms':>7} {'pq proj ms':>10} {'speed-up':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.datasets:
+            if not pathlib.Path(DATASETS[name][0]).exists():
+                print(f"[WARN] {DATASETS[name][0]} missing – skipped")
+                continue
+            for factor in args.scales:
+                rows, sizes, t = bench(name, factor, pathlib.Path(tmp))
+                print(f"{name:>12} {rows:>8} {sizes['text'] / 1e6:>8.2f} {sizes['columnar'] / 1e6:>7.2f} "
+                      f"{t['text'] * 1e3:>8.1f} {t['columnar'] * 1e3:>7.1f} "
+                      f"{t['columnar, projected'] * 1e3:>10.1f} {t['text'] / t['columnar']:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
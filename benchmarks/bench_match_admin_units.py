@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+bench_match_admin_units.py
+──────────────────────────
+Scaling of notice-title → forest matching: the old per-forest substring scan
+against the compiled phrase automaton, on synthetic titles.
+
+USAGE (from project root)
+  python benchmarks/bench_match_admin_units.py [--sizes 1000 10000 100000]
+"""
+import argparse, pathlib, random, sys, time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "scripts"))
+from match_admin_units import build_matcher, match_title, simplify   # noqa: E402
+
+WORDS = ["Pine", "Ridge", "Cedar", "Lake", "Bear", "River", "Stone", "Valley", "Eagle",
+         "Sierra", "Black", "Hills", "Red", "Rock", "Silver", "Creek", "Blue", "Mountain"]
+FILLER = ("Notice of Intent to Prepare an Environmental Impact Statement for the "
+          "Vegetation Management Project; Request for Comments; Oregon").split()
+
+def forest_names(n=150, seed=1):
+    rnd = random.Random(seed)
+    names = set()
+    while len(names) < n:
+        names.add(" ".join(rnd.sample(WORDS, rnd.choice((1, 2)))) + " National Forest")
+    return sorted(names)
+
+def titles(forests, n, seed=2):
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        words = rnd.sample(FILLER, 10)
+        for f in rnd.sample(forests, rnd.choice((0, 1, 1, 2))):
+            words.insert(rnd.randrange(len(words)), f + ";")
+        out.append(" ".join(words))
+    return out
+
+def naive_matcher(forests):
+    """the original match_title: two substring scans per forest per title"""
+    canonical = {name: simplify(name) for name in forests}
+
+    def match(title):
+        low, hits = title.lower(), []
+        for full, simp in canonical.items():
+            if simp and simp in low:
+                hits.append(full)
+            elif full.lower() in low:
+                hits.append(full)
+        return sorted(set(hits))
+    return match
+
+def bench(fn, items):
+    start = time.perf_counter()
+    for t in items:
+        fn(t)
+    return time.perf_counter() - start
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    ap.add_argument("--forests", type=int, default=150)
+    args = ap.parse_args()
+
+    forests = forest_names(args.forests)
+    start = time.perf_counter()
+    automaton = build_matcher(forests)
+    print(f"compiled {len(forests)} forests in {(time.perf_counter() - start) * 1e3:.1f} ms")
+    naive = naive_matcher(forests)
+
+    print(f"{'titles':>8} {'substring s':>12} {'automaton s':>12} {'titles/s':>10} {'speed-up':>9}")
+    for n in args.sizes:
+        items = titles(forests, n)
+        t_naive = bench(naive, items)
+        t_ac = bench(lambda t: match_title(t, automaton), items)
+        print(f"{n:>8} {t_naive:>12.3f} {t_ac:>12.3f} {n / t_ac:>10.0f} {t_naive / t_ac:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
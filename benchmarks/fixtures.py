@@ -0,0 +1,281 @@
+"""
+fixtures.py
+───────────
+Offline inputs for the benchmark suite.
+
+* FixtureServer – a localhost HTTP server that answers like the Federal
+  Register documents API and the two ArcGIS query endpoints (FS planning
+  units, BLM land use plans), so the fetch_* code runs unchanged – real
+  requests, pooling, paging and parsing – without touching the network
+* eplanning_fixture – a recorded-grid directory in the layout
+  `blm_download.py --replay` reads
+* scaled_* – the real files in data/ tiled up N× (with unique ids/names and
+  shifted geometry) for the join stages
+
+Everything is deterministic for a given scale and seed.
+"""
+import csv, json, pathlib, random, sys, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "scripts"))
+from blm_coords_join import norm   # noqa: E402
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+FORESTS = ROOT / "data/outputs/usfs_selected_forests.geojson"
+NOTICES = ROOT / "data/outputs/usfs_open_comments_2025-08-07.csv"
+BLM_PROJECTS = ROOT / "data/raw/blm_active_projects.csv"
+MAX_RING = 128                   # vertices kept per ring of the base polygons
+MAX_PARTS = 8                    # largest parts kept per forest
+SHIFT = 0.05                     # degrees between tiled copies
+
+
+# ──── base data from data/ ───────────────────────────────────────────
+def decimate(ring, keep=MAX_RING):
+    step = max(1, len(ring) // keep)
+    out = ring[::step]
+    return out if out[-1] == ring[-1] else out + [ring[-1]]
+
+
+def base_forests():
+    """the forest polygons in data/, thinned so 1000× copies stay small"""
+    features = json.loads(FORESTS.read_text(encoding="utf-8"))["features"]
+    out = []
+    for f in features:
+        g = f["geometry"]
+        polys = [g["coordinates"]] if g["type"] == "Polygon" else g["coordinates"]
+        polys = sorted(polys, key=lambda p: len(p[0]), reverse=True)[:MAX_PARTS]
+        polys = [[decimate(r) for r in p] for p in polys]
+        out.append({"type": "Feature", "properties": dict(f["properties"]),
+                    "geometry": {"type": "MultiPolygon", "coordinates": polys}})
+    return out
+
+
+def shifted(geometry, k):
+    dx = dy = k * SHIFT
+    return {"type": geometry["type"], "coordinates": [
+        [[[x + dx, y + dy] for x, y in ring] for ring in poly] for poly in geometry["coordinates"]]}
+
+
+def copy_name(name, k):
+    """'Dixie National Forest', 3 → 'Dixie 3 National Forest' (copy 0 keeps the name)"""
+    if not k:
+        return name
+    head, sep, tail = name.partition(" National Forest")
+    return f"{head} {k}{sep}{tail}"
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        return list(csv.DictReader(fh))
+
+
+def write_csv(rows, path, fields=None):
+    fields = fields or list(rows[0])
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        w = csv.DictWriter(fh, fieldnames=fields, extrasaction="ignore")
+        w.writeheader()
+        w.writerows(rows)
+    return path
+
+
+# ──── scaled tables / layers for the join stages ─────────────────────
+def scaled_forests(factor):
+    base = base_forests()
+    out = []
+    for k in range(factor):
+        for f in base:
+            props = dict(f["properties"])
+            props["FORESTNAME"] = copy_name(props["FORESTNAME"], k)
+            out.append({"type": "Feature", "properties": props, "geometry": shifted(f["geometry"], k)})
+    return out
+
+
+def scaled_notices(factor, forest_names, seed=7):
+    """FR notice rows (the data/ file's rows, repeated) naming 0–3 of the given forests"""
+    rnd = random.Random(seed)
+    base = read_csv(NOTICES)
+    rows = []
+    for k in range(factor):
+        for i, row in enumerate(base):
+            row = dict(row)
+            row["document_number"] = f"{row['document_number']}-{k}-{i}"
+            row["admin unit"] = "; ".join(rnd.sample(forest_names, rnd.choice((0, 1, 1, 2, 3))))
+            rows.append(row)
+    return rows
+
+
+def centroid_rows(forests):
+    rows = []
+    for f in forests:
+        ring = f["geometry"]["coordinates"][0][0]
+        rows.append({"FORESTNAME": f["properties"]["FORESTNAME"],
+                     "lon": sum(x for x, _ in ring) / len(ring), "lat": sum(y for _, y in ring) / len(ring)})
+    return rows
+
+
+def scaled_blm_projects(factor, seed=11):
+    """(project rows, admin-unit index) – offices multiplied along with the rows, some misspelt
+
+    The index has the {norm(name): [lat, lon, name]} layout of
+    data/processed/blm_admu_centroids.json.
+    """
+    rnd = random.Random(seed)
+    base = read_csv(BLM_PROJECTS)
+    offices = sorted({r["Lead Office"] for r in base if r["Lead Office"]})
+    rows, units = [], {}
+    for k in range(factor):
+        for r in base:
+            r = dict(r)
+            r["NEPA #"] = f"{r['NEPA #']}-{k}"
+            office = r["Lead Office"]
+            if office and k:
+                office = office.replace(" FO", f" {k} FO").replace(" DO", f" {k} DO")
+            if office and rnd.random() < 0.1:       # typo → exercises the fuzzy path
+                i = rnd.randrange(len(office))
+                office = office[:i] + office[i + 1:]
+            r["Lead Office"] = office
+            rows.append(r)
+        for office in offices:
+            name = (office if not k else office.replace(" FO", f" {k} FO").replace(" DO", f" {k} DO"))
+            name = name.replace(" FO", " Field Office").replace(" DO", " District Office")
+            units[norm(name)] = [40 + rnd.random() * 8, -120 + rnd.random() * 15, name]
+    return rows, units
+
+
+# ──── ePlanning grid fixture for blm_download --replay ──────────────
+def eplanning_fixture(directory, rows, page_size=1000):
+    """write endpoint.json + page_NNNN.json for `rows` (dicts keyed by CSV header)"""
+    directory = pathlib.Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    headers = list(rows[0]) if rows else []
+    columns = {f"col{i}": h for i, h in enumerate(headers)}
+    (directory / "endpoint.json").write_text(json.dumps({
+        "url": "https://eplanning.blm.gov/eplanning-api/search", "method": "POST",
+        "params": {}, "body": {"page": 0, "size": page_size}, "columns": columns,
+        "page_size": page_size}))
+    by_id = {h: cid for cid, h in columns.items()}
+    for index in range(0, max(1, -(-len(rows) // page_size))):
+        chunk = rows[index * page_size:(index + 1) * page_size]
+        records = [{by_id[h]: v for h, v in r.items() if h in by_id} for r in chunk]
+        (directory / f"page_{index:04d}.json").write_text(
+            json.dumps({"content": records, "totalElements": len(rows)}))
+    return directory
+
+
+# ──── HTTP fixture server ────────────────────────────────────────────
+def esri_rings(geometry):
+    """GeoJSON (counter-clockwise outer) → ArcGIS rings (clockwise outer)"""
+    rings = []
+    for poly in geometry["coordinates"]:
+        rings.extend(ring[::-1] for ring in poly)
+    return rings
+
+
+class FixtureData:
+    """the synthetic remote datasets for one scale"""
+
+    def __init__(self, scale):
+        self.scale = scale
+        self.forests = scaled_forests(scale)         # planning units / land use plans
+        notices = read_csv(NOTICES)
+        self.fr_docs = []
+        for k in range(scale):
+            for i, row in enumerate(notices):
+                doc = {f: row.get(f) or None for f in
+                       ("title", "type", "publication_date", "comment_url", "html_url")}
+                doc.update(document_number=f"{row['document_number']}-{k}-{i}",
+                           comments_close_on="2099-12-31" if (k + i) % 3 else "2000-01-01",
+                           docket_ids=[])
+                self.fr_docs.append(doc)
+
+    def feature(self, oid):
+        f = self.forests[oid - 1]
+        return f, {**f["properties"], "OBJECTID": oid}
+
+    @property
+    def count(self):
+        return len(self.forests)
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    data: FixtureData = None
+    cache: dict = {}
+    lock = threading.Lock()
+
+    def do_GET(self):
+        self.answer(urlparse(self.path), parse_qs(urlparse(self.path).query))
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+        self.answer(urlparse(self.path), parse_qs(body))
+
+    def answer(self, url, qs):
+        key = (url.path, json.dumps(qs, sort_keys=True))
+        with self.lock:
+            payload = self.cache.get(key)
+        if payload is None:
+            payload = json.dumps(self.route(url.path, {k: v[-1] for k, v in qs.items()}, qs)).encode()
+            with self.lock:
+                self.cache[key] = payload
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def route(self, path, q, multi):
+        d = self.data
+        if path == "/fr/documents.json":
+            per_page, page = int(q.get("per_page", 20)), int(q.get("page", 1))
+            docs = d.fr_docs[(page - 1) * per_page:page * per_page]
+            fields = multi.get("fields[]")
+            if fields:
+                docs = [{k: doc.get(k) for k in fields} for doc in docs]
+            return {"count": len(d.fr_docs), "total_pages": -(-len(d.fr_docs) // per_page),
+                    "results": docs}
+        if path == "/fs/MapServer/0":
+            return {"name": "Planning Units", "maxRecordCount": 1000, "geometryType": "esriGeometryPolygon"}
+        if path == "/fs/MapServer/0/query":
+            if q.get("returnIdsOnly") == "true":
+                return {"objectIdFieldName": "OBJECTID", "objectIds": list(range(1, d.count + 1))}
+            feats = []
+            for oid in map(int, q["objectIds"].split(",")):
+                f, props = self.data.feature(oid)
+                feats.append({"type": "Feature", "id": oid, "properties": props, "geometry": f["geometry"]})
+            return {"type": "FeatureCollection", "features": feats}
+        if path == "/lup/query":
+            if q.get("returnCountOnly") == "true":
+                return {"count": d.count}
+            start, n = int(q.get("resultOffset", 0)), int(q.get("resultRecordCount", 1000))
+            feats = []
+            for oid in range(start + 1, min(start + n, d.count) + 1):
+                f, props = self.data.feature(oid)
+                feats.append({"attributes": props, "geometry": {"rings": esri_rings(f["geometry"])}})
+            return {"features": feats, "exceededTransferLimit": start + n < d.count}
+        return {"error": {"code": 404, "message": f"no fixture for {path}"}}
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+class FixtureServer:
+    """`with FixtureServer(scale) as srv:` – srv.url('/fr/documents.json') etc."""
+
+    def __init__(self, scale):
+        self.data = FixtureData(scale)
+        handler = type("Handler", (FixtureHandler,), {"data": self.data, "cache": {}})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+        return False
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+run_suite.py
+────────────
+Benchmark every pipeline stage on fixture data, fully offline, and compare
+against a stored baseline so slow-downs show up before they ship.
+
+Stages
+  fetch_fr, fetch_fs_planning_units, fetch_lup_approved – the real fetch code
+      against benchmarks/fixtures.FixtureServer on 127.0.0.1
+  blm_download – --replay of a generated ePlanning page fixture
+  match_title, merge_csv_geojson, usfs_join_geom, blm_coords_join,
+      assign_blm_plans – the joins on the data/ files tiled up N×
+
+Per stage and scale: best wall time of --repeat runs, peak Python heap
+(tracemalloc, one extra run – Python allocations only, not process RSS:
+memory held by numpy/GEOS/Arrow buffers is mostly invisible to it) and
+items/s.  Every stage runs once untimed
+first, so the fixture server's memoized responses are warm.  Any socket to a
+non-loopback host raises, so nothing can reach the network by accident.
+
+  benchmarks/baseline.json  {"stage@scale": {"seconds", "py_heap_mb", "items"}}
+                            (committed; re-record with --save-baseline after an
+                            intended change or on a different machine)
+
+USAGE (from project root)
+  python benchmarks/run_suite.py [--scales 10 100 1000] [--stages fetch_fr ...] [--repeat 3]
+  python benchmarks/run_suite.py --save-baseline     # record this machine's numbers
+  python benchmarks/run_suite.py --check             # exit 1 on a regression
+requires: requests, pandas, pyarrow, geopandas
+"""
+import argparse, contextlib, datetime as dt, json, os, pathlib, socket, sys, tempfile, time, tracemalloc
+
+HERE = pathlib.Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent / "scripts"))
+import fixtures   # noqa: E402
+
+BASELINE = HERE / "baseline.json"
+TOLERANCE = 0.25                 # slower / bigger than baseline by more than this → regression
+NOISE = {"seconds": 0.05, "py_heap_mb": 1.0}   # absolute changes below this are jitter, never flagged
+TODAY = dt.date(2025, 8, 7)      # the FR fixture's notice dates are relative to this
+
+
+# ──── offline guard ──────────────────────────────────────────────────
+def loopback_only():
+    real = socket.getaddrinfo
+
+    def getaddrinfo(host, *args, **kwargs):
+        if host not in ("127.0.0.1", "localhost", "::1"):
+            raise OSError(f"benchmark suite is offline – refused connection to {host}")
+        return real(host, *args, **kwargs)
+
+    socket.getaddrinfo = getaddrinfo
+    os.environ["NO_PROXY"] = os.environ["no_proxy"] = "127.0.0.1,localhost"
+
+
+# ──── stages: setup(scale, tmp, srv) → (items, run) ──────────────────
+def client():
+    from rest_client import RestClient
+    return RestClient(use_cache=False, pool_size=4)
+
+
+def stage_fetch_fr(scale, tmp, srv):
+    import fetch_fr
+    fetch_fr.BASE = srv.url("/fr/documents.json")
+    out = tmp / "fr.csv"
+
+    def run():
+        fetch_fr.write_csv(fetch_fr.fetch_open_docs(client(), TODAY), out)
+    return len(srv.data.fr_docs), run
+
+
+def stage_fetch_fs_planning_units(scale, tmp, srv):
+    import fetch_fs_planning_units as fs
+    from geojson_stream import FeatureCollectionWriter
+    fs.BASE_URL = srv.url("/fs/MapServer/0")
+    out = tmp / "fs_planning_units.geojson"
+
+    def run():
+        c = client()
+        chunk = min(fs.CHUNK_SIZE, fs.get_layer_info(c)["maxRecordCount"])
+        ids = fs.get_all_object_ids(c)
+        with FeatureCollectionWriter(out) as w:
+            w.write_all(fs.iter_features(c, ids, chunk, fs.WORKERS))
+    return srv.data.count, run
+
+
+def stage_fetch_lup_approved(scale, tmp, srv):
+    import fetch_lup_approved as lup
+    from geojson_stream import FeatureCollectionWriter
+    lup.BASE_URL = srv.url("/lup/query")
+    out = tmp / "approved_land_use_plans.geojson"
+    page_size = 100                  # several pages even at small scales
+
+    def run():
+        with FeatureCollectionWriter(out) as w:
+            for features in lup.iter_pages(client(), page_size, lup.WORKERS):
+                w.write_all(features)
+    return srv.data.count, run
+
+
+def stage_blm_download(scale, tmp, srv):
+    import blm_download
+    rows, _ = fixtures.scaled_blm_projects(scale)
+    recorded = fixtures.eplanning_fixture(tmp / "eplanning", rows)
+    out = tmp / "blm_active_projects.csv"
+
+    def run():
+        blm_download.write_rows(blm_download.replay_api(recorded), out)
+    return len(rows), run
+
+
+def stage_match_title(scale, tmp, srv):
+    from bench_match_admin_units import titles
+    from match_admin_units import build_matcher, match_title
+    names = [f["properties"]["FORESTNAME"] for f in fixtures.scaled_forests(scale)]
+    items = titles(names, len(fixtures.read_csv(fixtures.NOTICES)) * scale * 10)
+
+    def run():
+        matcher = build_matcher(names)
+        for t in items:
+            match_title(t, matcher)
+    return len(items), run
+
+
+def stage_merge_csv_geojson(scale, tmp, srv):
+    import merge_csv_geojson as m
+    from columnar import iter_features, read_table, write_layer, write_table
+    from geojson_stream import FeatureCollectionWriter
+    import geopandas as gpd
+    import pandas as pd
+
+    forests = fixtures.scaled_forests(scale)
+    names = [f["properties"]["FORESTNAME"] for f in forests]
+    write_layer(gpd.GeoDataFrame.from_features(forests, crs=4326), tmp / "forests.parquet")
+    write_table(pd.DataFrame(fixtures.scaled_notices(scale, names)), tmp / "notices.parquet",
+                schema="fr_notices")
+    out = tmp / "usfs_merged.geojson"
+
+    def run():
+        index = m.build_forest_index(read_table(tmp / "notices.parquet",
+                                                columns=["admin unit"] + m.NOTICE_FIELDS))
+        with FeatureCollectionWriter(out) as w:
+            w.write_all(m.merge_features(iter_features(tmp / "forests.parquet"), index))
+    return len(forests), run
+
+
+def stage_usfs_join_geom(scale, tmp, srv):
+    import usfs_join_geom as u
+    from columnar import read_table, write_table
+    import pandas as pd
+
+    forests = fixtures.scaled_forests(scale)
+    names = [f["properties"]["FORESTNAME"] for f in forests]
+    notices = fixtures.scaled_notices(scale * 10, names)
+    write_table(pd.DataFrame(notices), tmp / "notices.parquet", schema="fr_notices")
+    write_table(pd.DataFrame(fixtures.centroid_rows(forests)), tmp / "centroids.parquet",
+                schema="forest_centroids")
+    out = tmp / "usfs_comments_with_coords.parquet"
+
+    def run():
+        comments = read_table(tmp / "notices.parquet", schema="fr_notices")
+        centroids = read_table(tmp / "centroids.parquet", columns=["FORESTNAME", "lon", "lat"])
+        write_table(u.join_coords(comments, centroids), out, schema="fr_notices")
+    return len(notices), run
+
+
+def stage_blm_coords_join(scale, tmp, srv):
+    from blm_coords_join import join, office_matcher
+    rows, units = fixtures.scaled_blm_projects(scale)
+    csv_in = fixtures.write_csv(rows, tmp / "blm_projects.csv")
+
+    def run():
+        join(csv_in, tmp / "blm_projects_with_coords.csv", office_matcher(units))
+    return len(rows), run
+
+
+def stage_assign_blm_plans(scale, tmp, srv):
+    from assign_blm_plans import assign_plans
+    import geopandas as gpd
+    import pandas as pd
+
+    plans = gpd.GeoDataFrame.from_features(
+        [{**f, "properties": {"NEPAnum": f"LUP-{i}", "LUPName": f["properties"]["FORESTNAME"]}}
+         for i, f in enumerate(srv.data.forests)], crs=4326)
+    w, s, e, n = plans.total_bounds
+    rows, _ = fixtures.scaled_blm_projects(scale)
+    for i, r in enumerate(rows):                 # spread the projects over the plans' extent
+        r["Longitude"] = w + (e - w) * ((i * 0.618034) % 1)
+        r["Latitude"] = s + (n - s) * ((i * 0.414214) % 1)
+    projects = pd.DataFrame(rows)
+
+    def run():
+        assign_plans(projects, plans)
+    return len(rows), run
+
+
+STAGES = {name[len("stage_"):]: fn for name, fn in globals().items() if name.startswith("stage_")}
+
+
+# ──── measuring ──────────────────────────────────────────────────────
+def measure(run, repeat):
+    """(best seconds, peak Python heap MB); stdout of the stage is discarded"""
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+        run()                                           # warm-up
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        tracemalloc.start()
+        try:
+            run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return best, peak / 1e6
+
+
+def compare(result, base, tolerance):
+    """'+12% time' style notes, and whether any exceeds the tolerance"""
+    notes, regressed = [], False
+    for field, label in (("seconds", "time"), ("py_heap_mb", "py heap")):
+        if not base.get(field):
+            continue
+        change = result[field] / base[field] - 1
+        if abs(result[field] - base[field]) < NOISE[field]:
+            continue
+        if change > tolerance:
+            regressed = True
+            notes.append(f"{change:+.0%} {label} REGRESSION")
+        elif abs(change) > tolerance:
+            notes.append(f"{change:+.0%} {label}")
+    return notes, regressed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline benchmark suite for the pipeline stages.")
+    ap.add_argument("--scales", type=int, nargs="+", default=[10, 100, 1000])
+    ap.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--baseline", type=pathlib.Path, default=BASELINE)
+    ap.add_argument("--tolerance", type=float, default=TOLERANCE,
+                    help=f"allowed slow-down / growth before flagging (default {TOLERANCE:.0%}%)")
+    ap.add_argument("--save-baseline", action="store_true", help="merge these results into the baseline")
+    ap.add_argument("--check", action="store_true", help="exit 1 if anything regressed")
+    args = ap.parse_args()
+
+    loopback_only()
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    results, regressions = {}, []
+
+    print(f"{'stage':>24} {'scale':>6} {'items':>8} {'s':>8} {'heap MB':>8} {'items/s':>10}  vs baseline")
+    for scale in args.scales:
+        with fixtures.FixtureServer(scale) as srv, tempfile.TemporaryDirectory() as tmp:
+            for name in args.stages:
+                stage_dir = pathlib.Path(tmp) / name
+                stage_dir.mkdir()
+                items, run = STAGES[name](scale, stage_dir, srv)
+                seconds, peak = measure(run, args.repeat)
+                key = f"{name}@{scale}"
+                results[key] = {"seconds": round(seconds, 5), "py_heap_mb": round(peak, 2), "items": items}
+                notes, regressed = compare(results[key], baseline.get(key, {}), args.tolerance)
+                if regressed:
+                    regressions.append(key)
+                if key not in baseline:
+                    notes = ["no baseline"]
+                print(f"{name:>24} {scale:>6} {items:>8} {seconds:>8.3f} {peak:>8.1f} "
+                      f"{items / max(seconds, 1e-9):>10.0f}  {', '.join(notes) or 'ok'}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps({**baseline, **results}, indent=2, sort_keys=True) + "\n")
+        print(f"[DONE] baseline → {args.baseline}")
+    if regressions:
+        print(f"[WARN] {len(regressions)} regression(s): {', '.join(regressions)}")
+        if args.check:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+assign_blm_plans.py
+───────────────────
+Answer "which land use plan governs this project" once, at build time: every
+BLM project point is assigned to the approved land use plan polygon(s) that
+contain it, and the plan columns are written into the project table.
+
+  Plan ID     NEPAnum of each containing plan, "; "-separated
+  Plan Name   LUPName of each containing plan, same order
+  Plan Count  number of containing plans (0 when none, blank without coordinates)
+
+Plans overlap (an RMP and its amendments), so a point may get several; they
+are listed smallest plan first, i.e. the most specific one leads.  The join is
+two vectorized passes: an STRtree over the plan polygons gives bounding-box
+candidates for all points at once, then a covers() test against the prepared
+polygons keeps the real hits.  Tens of thousands of points take seconds.
+
+USAGE (from project root)
+  python scripts/assign_blm_plans.py [--projects data/outputs/blm_projects_with_coords.csv]
+         [--plans data/outputs/approved_land_use_plans.geojson] [-o data/outputs/blm_projects_with_plans.csv]
+requires: pandas, geopandas, shapely ≥ 2
+"""
+import argparse
+
+import metrics
+from columnar import read_layer, read_table, write_table
+
+PROJECTS = "data/outputs/blm_projects_with_coords.csv"
+PLANS = "data/outputs/approved_land_use_plans.geojson"
+OUTPUT = "data/outputs/blm_projects_with_plans.csv"
+ID_FIELD, NAME_FIELD = "NEPAnum", "LUPName"
+PLAN_COLUMNS = ["Plan ID", "Plan Name", "Plan Count"]
+SEPARATOR = "; "
+
+
+def plan_index(plans):
+    """(prepared polygons, STRtree) over a GeoDataFrame of plans in EPSG:4326"""
+    import shapely
+
+    # no make_valid(): point-in-area location works on self-intersecting rings too,
+    # and repairing thousands of plan polygons costs far more than the whole join
+    geoms = plans.geometry.to_numpy().copy()
+    shapely.prepare(geoms)
+    return geoms, shapely.STRtree(geoms)
+
+
+def assign(lon, lat, plans):
+    """(point row, plan row) pairs of every point covered by a plan, smallest plan first"""
+    import numpy as np
+    import shapely
+
+    geoms, tree = plan_index(plans)
+    valid = np.flatnonzero(np.isfinite(lon) & np.isfinite(lat))
+    points = shapely.points(lon[valid], lat[valid])
+    with metrics.span("query", points=len(points), plans=len(geoms)) as s:
+        pt, poly = tree.query(points)                      # bounding-box candidates
+        hit = shapely.covers(geoms[poly], points[pt])      # exact test, prepared polygons
+        pt, poly = valid[pt[hit]], poly[hit]
+        s.update(candidates=int(hit.size), hits=int(hit.sum()))
+    area = shapely.area(geoms)[poly]                       # degrees², only used for ordering
+    order = np.lexsort((poly, area, pt))                   # ties: plan file order
+    return pt[order], poly[order]
+
+
+def plan_columns(n_rows, has_coords, pt, poly, plans, id_field=ID_FIELD, name_field=NAME_FIELD):
+    """DataFrame of the PLAN_COLUMNS for n_rows points"""
+    import pandas as pd
+
+    def text(field):
+        if field not in plans.columns:
+            return pd.Series([""] * len(plans))
+        return plans[field].astype("string").fillna("").str.strip().reset_index(drop=True)
+
+    pairs = pd.DataFrame({"row": pt, "id": text(id_field).to_numpy()[poly],
+                          "name": text(name_field).to_numpy()[poly]})
+    grouped = pairs.groupby("row", sort=False)
+    out = pd.DataFrame(index=pd.RangeIndex(n_rows))
+    out["Plan ID"] = grouped["id"].agg(SEPARATOR.join)
+    out["Plan Name"] = grouped["name"].agg(SEPARATOR.join)
+    out["Plan Count"] = grouped.size()
+    out["Plan Count"] = out["Plan Count"].fillna(0).astype("Int64").where(has_coords)
+    return out.astype({"Plan ID": "string", "Plan Name": "string"})
+
+
+def assign_plans(projects, plans, id_field=ID_FIELD, name_field=NAME_FIELD):
+    """the project table with PLAN_COLUMNS added (any previous ones replaced)"""
+    import pandas as pd
+
+    projects = projects.drop(columns=PLAN_COLUMNS, errors="ignore").reset_index(drop=True)
+    if plans.crs is not None and plans.crs.to_epsg() != 4326:
+        with metrics.span("reproject", rows=len(plans), crs=4326):
+            plans = plans.to_crs(4326)
+    lon = pd.to_numeric(projects["Longitude"], errors="coerce").to_numpy("float64", na_value=float("nan"))
+    lat = pd.to_numeric(projects["Latitude"], errors="coerce").to_numpy("float64", na_value=float("nan"))
+    pt, poly = assign(lon, lat, plans)
+    with metrics.span("assign", rows=len(projects)):
+        has_coords = pd.Series(pd.notna(lon) & pd.notna(lat))
+        cols = plan_columns(len(projects), has_coords, pt, poly, plans, id_field, name_field)
+    return pd.concat([projects, cols], axis=1)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Assign BLM projects to the land use plans containing them.")
+    ap.add_argument("--projects", default=PROJECTS, help="project table with Latitude/Longitude")
+    ap.add_argument("--plans", default=PLANS, help="approved land use plan polygons")
+    ap.add_argument("-o", "--out", default=OUTPUT)
+    ap.add_argument("--id-field", default=ID_FIELD, help=f"plan id property (default {ID_FIELD})")
+    ap.add_argument("--name-field", default=NAME_FIELD, help=f"plan name property (default {NAME_FIELD})")
+    metrics.add_metrics_args(ap)
+    args = ap.parse_args()
+
+    with metrics.run("assign_blm_plans", args):
+        projects = read_table(args.projects, schema="blm_projects")
+        plans = read_layer(args.plans, columns=[args.id_field, args.name_field])
+        out = assign_plans(projects, plans, args.id_field, args.name_field)
+        write_table(out, args.out, schema="blm_projects")
+
+        counts = out["Plan Count"]
+        assigned, located = int((counts > 0).sum()), int(counts.notna().sum())
+        metrics.count("projects.assigned", assigned)
+        metrics.count("projects.unplanned", located - assigned)
+        metrics.count("projects.no_coords", len(out) - located)
+        print(f"✅  wrote {args.out}  ({len(out)} projects: {assigned} in a plan, "
+              f"{located - assigned} outside every plan, {len(out) - located} without coordinates)")
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,102 @@
-import os
+import argparse
+import asyncio
 import csv
+import sqlite3
 import time
-from playwright.sync_api import sync_playwright
 
-def extract_project_urls(page):
-    import time
-
-    page.goto('https://eplanning.blm.gov/eplanning-ui/search?filterSearch={"open":true,"active":true}')
-    page.wait_for_timeout(5000)  # Wait for initial load
+import metrics
+
+SEARCH_URL = 'https://eplanning.blm.gov/eplanning-ui/search?filterSearch={"open":true,"active":true}'
+FIELDNAMES = ['Project URL', 'Latitude', 'Longitude']
+CACHE_PATH = 'blm_coords_cache.sqlite'
+
+# True once the project map has drawn its location graphic(s), or has finished
+# updating and stayed idle for IDLE_MS without any (a project with no location).
+IDLE_MS = 1000
+MAP_READY_JS = '''() => {
+    try {
+        const views = window.require("esri/views/MapView").instances;
+        if (!views || !views.length) return false;
+        const view = views[0];
+        if (view.graphics.items.length) return true;
+        if (!view.ready || view.updating) {
+            window.__onxIdleSince = null;
+            return false;
+        }
+        window.__onxIdleSince = window.__onxIdleSince || Date.now();
+        return Date.now() - window.__onxIdleSince >= %d;
+    } catch (e) {
+        return false;
+    }
+}''' % IDLE_MS
+
+COORDS_JS = '''() => {
+    const views = window.require("esri/views/MapView").instances;
+    if (!views || views.length === 0) return null;
+    const graphics = views[0].graphics.items;
+    if (!graphics || graphics.length === 0) return null;
+    const coord = graphics[0].geometry;
+    return { lat: coord.latitude, lon: coord.longitude };
+}'''
+
+
+class CoordCache:
+    """Per-project lat/lon cache so daily runs only load new or expired projects."""
+
+    def __init__(self, path, max_age_days):
+        self.conn = sqlite3.connect(path)
+        self.max_age = max_age_days * 86400
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS coords ("
+            " url TEXT PRIMARY KEY, lat REAL, lon REAL, fetched_at REAL NOT NULL)"
+        )
+
+    def fresh(self, urls):
+        """Return {url: (lat, lon)} for the urls cached within max_age."""
+        cutoff = time.time() - self.max_age
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted (url TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM wanted")
+        self.conn.executemany("INSERT OR IGNORE INTO wanted VALUES (?)", ((u,) for u in urls))
+        rows = self.conn.execute(
+            "SELECT c.url, c.lat, c.lon FROM coords c JOIN wanted w ON w.url = c.url"
+            " WHERE c.fetched_at >= ?", (cutoff,)).fetchall()
+        return {url: (lat, lon) for url, lat, lon in rows}
+
+    def put(self, url, lat, lon):
+        # committed per project so an interrupted run resumes where it stopped
+        self.conn.execute(
+            "INSERT OR REPLACE INTO coords (url, lat, lon, fetched_at) VALUES (?, ?, ?, ?)",
+            (url, lat, lon, time.time()),
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+async def extract_project_urls(page):
+    with metrics.span("page", url=SEARCH_URL):
+        await page.goto(SEARCH_URL)
+    with metrics.span("wait"):
+        await page.wait_for_timeout(5000)  # Wait for initial load
 
     project_urls = set()
     previous_count = -1
 
     while True:
         # Find all cells in the Project Name column
-        project_name_cells = page.query_selector_all('div[col-id="projectName"] a')
+        project_name_cells = await page.query_selector_all('div[col-id="projectName"] a')
 
         for cell in project_name_cells:
-            href = cell.get_attribute('href')
+            href = await cell.get_attribute('href')
             if href:
                 full_url = "https://eplanning.blm.gov" + href
                 project_urls.add(full_url)
 
         # Scroll down a bit to load next set of rows
-        page.mouse.wheel(0, 500)
-        time.sleep(0.5)
+        await page.mouse.wheel(0, 500)
+        with metrics.span("wait"):
+            await page.wait_for_timeout(500)
 
         # Stop if no new links are found after scroll
         if len(project_urls) == previous_count:
@@ -35,21 +107,21 @@ def extract_project_urls(page):
     return list(project_urls)
 
 
-def extract_coords_from_project(page, url):
+async def extract_coords_from_project(page, url, timeout=15000):
+    """Return (lat, lon), (None, None) if the map has no location, or None on failure."""
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
     print(f"Processing project: {url}")
     try:
-        page.goto(url)
-        page.wait_for_selector('esri-view-root', timeout=15000)
-        time.sleep(5)  # Wait for map to fully load
-
-        coords = page.evaluate('''() => {
-            const views = window.require("esri/views/MapView").instances;
-            if (!views || views.length === 0) return null;
-            const graphics = views[0].graphics.items;
-            if (!graphics || graphics.length === 0) return null;
-            const coord = graphics[0].geometry;
-            return { lat: coord.latitude, lon: coord.longitude };
-        }''')
+        await page.goto(url)
+        await page.wait_for_selector('esri-view-root', timeout=timeout)
+        try:
+            # wait for the graphics (or an idle, empty map) instead of sleeping a fixed 5 s
+            await page.wait_for_function(MAP_READY_JS, timeout=timeout)
+        except PlaywrightTimeoutError:
+            pass  # map never settled; read whatever is there
+
+        coords = await page.evaluate(COORDS_JS)
         if coords:
             print(f"Coords found: {coords['lat']}, {coords['lon']}")
             return coords['lat'], coords['lon']
@@ -58,32 +130,92 @@ def extract_coords_from_project(page, url):
             return None, None
     except Exception as e:
         print(f"Failed to extract coords for {url}: {e}")
-        return None, None
+        return None
 
-def main():
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
-        page = context.new_page()
+
+async def worker(context, queue, writer, fh, cache, timeout):
+    """One browser page pulling URLs off the shared queue until it is empty."""
+    page = await context.new_page()
+    try:
+        while True:
+            try:
+                url = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            with metrics.span("project", url=url) as s:
+                coords = await extract_coords_from_project(page, url, timeout)
+                s["result"] = "failed" if coords is None else "found" if coords[0] is not None else "none"
+            metrics.count(f"coords.{s['result']}")
+            if coords is None:
+                lat = lon = None   # failed load – left out of the cache so it is retried
+            else:
+                lat, lon = coords
+                cache.put(url, lat, lon)
+            # rows go straight to disk so a crash keeps completed work
+            writer.writerow({'Project URL': url, 'Latitude': lat, 'Longitude': lon})
+            fh.flush()
+    finally:
+        await page.close()
+
+
+async def run(out_path, workers, timeout, cache):
+    from playwright.async_api import async_playwright   # imported only when scraping
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        context = await browser.new_context()
+        page = await context.new_page()
 
         # Step 1: Extract Project URLs from Search Page
-        project_urls = extract_project_urls(page)
+        project_urls = await extract_project_urls(page)
+        await page.close()
 
-        # Step 2: Visit each project and get coordinates
-        output_rows = []
+        cached = cache.fresh(set(project_urls))
+        queue = asyncio.Queue()
         for url in project_urls:
-            lat, lon = extract_coords_from_project(page, url)
-            output_rows.append({'Project URL': url, 'Latitude': lat, 'Longitude': lon})
-
-        # Step 3: Write Output CSV
-        with open('blm_projects_with_coords.csv', 'w', newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=['Project URL', 'Latitude', 'Longitude'])
+            if url not in cached:
+                queue.put_nowait(url)
+        print(f"{len(cached)} projects cached, {queue.qsize()} to fetch.")
+        metrics.count("cache.hits", len(cached))
+        metrics.count("cache.misses", queue.qsize())
+
+        # Step 2: Visit uncached projects on a pool of pages, writing rows as they arrive
+        with open(out_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
             writer.writeheader()
-            writer.writerows(output_rows)
+            for url, (lat, lon) in cached.items():
+                writer.writerow({'Project URL': url, 'Latitude': lat, 'Longitude': lon})
+            f.flush()
+            await asyncio.gather(*(
+                worker(context, queue, writer, f, cache, timeout)
+                for _ in range(max(1, min(workers, queue.qsize())))
+            ))
+
+        print(f"✅ Done! Data written to {out_path}")
+
+        await browser.close()
 
-        print("✅ Done! Data written to blm_projects_with_coords.csv")
 
-        browser.close()
+def main():
+    ap = argparse.ArgumentParser(description="Scrape map coordinates for active BLM ePlanning projects.")
+    ap.add_argument("-o", "--out", default="blm_projects_with_coords.csv")
+    ap.add_argument("-w", "--workers", type=int, default=4,
+                    help="number of browser pages visiting projects concurrently")
+    ap.add_argument("--timeout", type=int, default=15000,
+                    help="per-project map load timeout in ms")
+    ap.add_argument("--cache", default=CACHE_PATH, help="SQLite coordinate cache")
+    ap.add_argument("--max-age-days", type=float, default=30,
+                    help="re-scrape cached projects older than this")
+    ap.add_argument("--refresh", action="store_true", help="ignore the cache and re-scrape everything")
+    metrics.add_metrics_args(ap)
+    args = ap.parse_args()
+
+    cache = CoordCache(args.cache, 0 if args.refresh else args.max_age_days)
+    try:
+        with metrics.run("blm_active_projects", args):
+            asyncio.run(run(args.out, args.workers, args.timeout, cache))
+    finally:
+        cache.close()
 
 if __name__ == "__main__":
     main()
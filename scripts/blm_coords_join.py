@@ -1,6 +1,18 @@
 #!/usr/bin/env python
-import argparse, csv, pathlib, re, zipfile, tempfile, shutil, unicodedata
-import geopandas as gpd
+import argparse, csv, hashlib, json, os, pathlib, re, zipfile, tempfile, shutil, unicodedata
+from collections import Counter
+
+import metrics
+from name_matcher import MIN_SCORE, NameMatcher
+
+LAYER = "blm_natl_admu_field_poly_webpub"
+INDEX = pathlib.Path("data/processed/blm_admu_centroids.json")
+
+# abbreviations seen in ePlanning "Lead Office" values (not MT/NM – state codes)
+ABBREVIATIONS = {
+    "MTN": "MOUNTAIN", "MTNS": "MOUNTAINS", "CYN": "CANYON", "FT": "FORT",
+    "NCA": "NATIONAL CONSERVATION AREA",
+}
 
 # ──── helper ──────────────────────────────────────────────────────────
 def norm(text: str) -> str:
@@ -9,51 +21,113 @@ def norm(text: str) -> str:
     t = re.sub(r"[^A-Z ]", "", t)
     return re.sub(r"\b(FIELD|DISTRICT|STATE|OFFICE|FO|DO)\b", "", t).strip()
 
-# ──── CLI args ───────────────────────────────────────────────────────
-ap = argparse.ArgumentParser()
-ap.add_argument("-z", "--zip", required=True, help=".gdb.zip file")
-ap.add_argument("-i", "--csv-in",  default="blm_active_projects.csv")
-ap.add_argument("-o", "--csv-out", default="blm_projects_with_coords.csv")
-args = ap.parse_args()
+def file_sha256(path: pathlib.Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
 
-ZIP = pathlib.Path(args.zip).expanduser()
-CSV_IN  = pathlib.Path(args.csv_in)
-CSV_OUT = pathlib.Path(args.csv_out)
+# ──── centroid index ─────────────────────────────────────────────────
+def build_index(zip_path: pathlib.Path) -> dict:
+    """unzip the gdb once and reduce it to {norm(name): [lat, lon, ADMU_NAME]}"""
+    import geopandas as gpd          # only needed when the index is (re)built
 
-# ──── unzip & load polygons ──────────────────────────────────────────
-tmp = tempfile.mkdtemp()
-try:
-    with zipfile.ZipFile(ZIP) as z:
-        z.extractall(tmp)
-    gdb = str(next(pathlib.Path(tmp).glob("*.gdb")))
-
-    layer = "blm_natl_admu_field_poly_webpub"
-    gdf = gpd.read_file(gdb, layer=layer, engine="pyogrio").to_crs(4326)
+    tmp = tempfile.mkdtemp()
+    try:
+        with zipfile.ZipFile(zip_path) as z:
+            z.extractall(tmp)
+        gdb = str(next(pathlib.Path(tmp).glob("*.gdb")))
+        gdf = gpd.read_file(gdb, layer=LAYER, engine="pyogrio").to_crs(4326)
+    finally:
+        shutil.rmtree(tmp)
 
     gdf["KEY"] = gdf["ADMU_NAME"].apply(norm)
     gdf = gdf.drop_duplicates(subset="KEY", keep="first")
-    gdf["Latitude"]  = gdf.geometry.centroid.y
-    gdf["Longitude"] = gdf.geometry.centroid.x
-    lookup = gdf.set_index("KEY")[["Latitude", "Longitude"]].to_dict("index")
+    centroids = gdf.geometry.centroid
+    return {
+        key: [lat, lon, name]
+        for key, lat, lon, name in zip(gdf["KEY"], centroids.y, centroids.x, gdf["ADMU_NAME"])
+    }
+
+def load_index(index_path: pathlib.Path, zip_path: pathlib.Path | None = None) -> dict:
+    """
+    Return the cached centroid index, rebuilding it only when the source zip
+    changed.  Size + mtime are checked first so an unchanged zip isn't re-hashed.
+    """
+    with metrics.span("read", path=str(index_path)):
+        cached = json.loads(index_path.read_text()) if index_path.exists() else None
+    if zip_path is None:
+        if cached is None:
+            raise SystemExit(f"no index at {index_path}; pass --zip to build it")
+        return cached["units"]
 
-    # ──── merge with CSV ──────────────────────────────────────────
-    with CSV_IN.open(newline='', encoding="utf-8-sig") as f:
+    st = os.stat(zip_path)
+    if cached and cached["size"] == st.st_size and cached["mtime"] == st.st_mtime:
+        return cached["units"]
+    digest = file_sha256(zip_path)
+    if cached and cached["sha256"] == digest:
+        units = cached["units"]
+    else:
+        print(f"[INFO] building admin-unit index from {zip_path.name} …")
+        with metrics.span("index", path=str(zip_path)):
+            units = build_index(zip_path)
+
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    index_path.write_text(json.dumps({
+        "source": zip_path.name, "layer": LAYER, "sha256": digest,
+        "size": st.st_size, "mtime": st.st_mtime, "units": units,
+    }))
+    return units
+
+def office_matcher(units: dict, min_score: float = MIN_SCORE) -> NameMatcher:
+    # index keys are already norm()'d; norm is idempotent so re-normalizing is harmless
+    return NameMatcher(units, normalize=norm, aliases=ABBREVIATIONS, min_score=min_score)
+
+# ──── merge with CSV ─────────────────────────────────────────────────
+def join(csv_in: pathlib.Path, csv_out: pathlib.Path, matcher: NameMatcher) -> tuple[int, Counter]:
+    methods = Counter()
+    with metrics.span("join", path=str(csv_in)) as s, csv_in.open(newline='', encoding="utf-8-sig") as f:
         rdr    = csv.reader(f)
         header = next(rdr)
         lead_i = header.index("Lead Office")
 
         out_rows = []
         for r in rdr:
-            lat = lon = ""
-            match = lookup.get(norm(r[lead_i]))
+            lat = lon = score = method = ""
+            match = matcher.match(r[lead_i])
             if match:
-                lat, lon = match["Latitude"], match["Longitude"]
-            out_rows.append(r + [lat, lon])
+                lat, lon = match.value[0], match.value[1]
+                score, method = match.score, match.method
+            methods[method or "none"] += 1
+            out_rows.append(r + [lat, lon, score, method])
+        s["rows"] = len(out_rows)
+    for method, n in methods.items():
+        metrics.count(f"match.{method}", n)
+
+    with metrics.span("write", path=str(csv_out), rows=len(out_rows)), \
+            csv_out.open("w", newline='', encoding="utf-8") as f:
+        csv.writer(f).writerows(
+            [header + ["Latitude", "Longitude", "Match Score", "Match Method"]] + out_rows)
+    return len(out_rows), methods
 
-    with CSV_OUT.open("w", newline='', encoding="utf-8") as f:
-        csv.writer(f).writerows([header + ["Latitude", "Longitude"]] + out_rows)
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-z", "--zip", help=".gdb.zip file (optional once the index is built)")
+    ap.add_argument("-i", "--csv-in",  default="blm_active_projects.csv")
+    ap.add_argument("-o", "--csv-out", default="blm_projects_with_coords.csv")
+    ap.add_argument("--index", default=str(INDEX), help="prebuilt name → centroid index")
+    ap.add_argument("--min-score", type=float, default=MIN_SCORE,
+                    help="lowest fuzzy-match confidence accepted (0–1)")
+    metrics.add_metrics_args(ap)
+    args = ap.parse_args()
 
-    print(f"✅  wrote {CSV_OUT}  ({len(out_rows)} rows)")
+    with metrics.run("blm_coords_join", args):
+        zip_path = pathlib.Path(args.zip).expanduser() if args.zip else None
+        matcher = office_matcher(load_index(pathlib.Path(args.index), zip_path), args.min_score)
+        n, methods = join(pathlib.Path(args.csv_in), pathlib.Path(args.csv_out), matcher)
+        print(f"✅  wrote {args.csv_out}  ({n} rows; "
+              + ", ".join(f"{k}: {v}" for k, v in methods.most_common()) + ")")
 
-finally:
-    shutil.rmtree(tmp)
+if __name__ == "__main__":
+    main()
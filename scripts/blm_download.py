@@ -1,8 +1,13 @@
 from pathlib import Path
+import argparse
 import csv
 import io
+import json
+import re
 import time
-from playwright.sync_api import sync_playwright
+from urllib.parse import urlsplit, parse_qsl
+
+import metrics
 
 SEARCH_URL = (
     "https://eplanning.blm.gov/eplanning-ui/"
@@ -11,12 +16,37 @@ SEARCH_URL = (
 
 OUT_FILE = Path("blm_active_projects.csv")   # final merged file
 
+# schema of the grid's "Download Results" export – kept identical in api mode
+CSV_COLUMNS = [
+    "NEPA #", "Type", "Project Name", "Lead Office", "Program", "NEPA Status",
+    "Document/Map Name", "Days Left", "Fiscal Year", "NOI Date", "Decision Date",
+    "FONSI Date",
+]
+DATE_COLUMNS = {"Days Left", "NOI Date", "Decision Date", "FONSI Date"}
+
+API_PAGE_SIZE = 1000
+
+# where paging lives in the captured grid request, and where rows live in its response
+PAGE_KEYS = ("page", "pageNumber", "pageIndex", "currentPage")
+OFFSET_KEYS = ("offset", "start", "startRow", "from")
+SIZE_KEYS = ("pageSize", "size", "limit", "rows", "perPage")
+RECORD_KEYS = ("content", "results", "data", "items", "rows", "records")
+TOTAL_KEYS = ("totalElements", "total", "totalCount", "totalRecords", "count", "lastRow")
+
+ISO_DATE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})")
+
+################################################################################
+# ui mode: click "Download Results" page by page ------------------------------
+################################################################################
+
 def download_page_csv(page):
     """click orange button, return csv text"""
-    with page.expect_download() as dlinfo:
+    with metrics.span("download"), page.expect_download() as dlinfo:
         page.locator('button:has-text("Download Results")').click()
     temp_path = dlinfo.value.path()
-    return Path(temp_path).read_text(encoding="utf-8")
+    text = Path(temp_path).read_text(encoding="utf-8")
+    metrics.count("download.bytes", len(text))
+    return text
 
 def ensure_100_rows(page):
     """set the 'Show ___ rows per page' dropdown to 100 if option exists"""
@@ -25,59 +55,235 @@ def ensure_100_rows(page):
         dropdown.select_option("100")  # silently ignored if 100 not in list
         time.sleep(1.0)
 
-def merge_csv_texts(csv_texts):
-    all_rows, header = [], None
+def iter_csv_texts(csv_texts):
+    """yield row lists in CSV_COLUMNS order from the per-page export texts"""
     for txt in csv_texts:
-        reader = csv.DictReader(io.StringIO(txt))
-        if header is None:
-            header = reader.fieldnames
-        for row in reader:
-            all_rows.append(row)
-    return header, all_rows
+        for row in csv.DictReader(io.StringIO(txt.lstrip("\ufeff"))):
+            yield [row.get(h) or "" for h in CSV_COLUMNS]
 
-def main():
+def download_ui(browser):
     merged_csvs = []
+    context  = browser.new_context(accept_downloads=True)
+    page     = context.new_page()
 
-    with sync_playwright() as p:
-        browser  = p.chromium.launch(headless=True)
-        context  = browser.new_context(accept_downloads=True)
-        page     = context.new_page()
-
-        print("→ opening search page …")
+    print("→ opening search page …")
+    with metrics.span("page", url=SEARCH_URL):
         page.goto(SEARCH_URL, wait_until="networkidle")
+    with metrics.span("wait"):
         page.wait_for_timeout(2500)
 
-        # try to bump to 100 rows per page
-        ensure_100_rows(page)
+    # try to bump to 100 rows per page
+    ensure_100_rows(page)
 
-        page_no = 1
-        while True:
-            print(f"  • downloading page {page_no}")
-            merged_csvs.append(download_page_csv(page))
+    page_no = 1
+    while True:
+        print(f"  • downloading page {page_no}")
+        merged_csvs.append(download_page_csv(page))
 
-            # is “Next Page” button disabled?
-            next_btn = page.locator('button[aria-label="Next Page"]')
-            if not next_btn.count() or next_btn.get_attribute("disabled"):
-                break
+        # is “Next Page” button disabled?
+        next_btn = page.locator('button[aria-label="Next Page"]')
+        if not next_btn.count() or next_btn.get_attribute("disabled"):
+            break
 
-            next_btn.click()
+        next_btn.click()
+        with metrics.span("wait"):
             page.wait_for_timeout(1200)   # wait grid redraw
-            page_no += 1
-
-        browser.close()
-
-    hdr, rows = merge_csv_texts(merged_csvs)
-    OUT_FILE.write_text(
-        "\ufeff" +  # keep Excel happy (BOM)
-        ",".join(hdr) + "\n" +
-        "\n".join(
-            ",".join(row[h] or "" for h in hdr)
-            for row in rows
-        ),
-        encoding="utf-8"
-    )
-
-    print(f"✅ merged {len(rows)} rows → {OUT_FILE.resolve()}")
+        page_no += 1
+
+    return iter_csv_texts(merged_csvs)
+
+################################################################################
+# api mode: replay the grid's own JSON request at the largest page size --------
+################################################################################
+
+def extract_records(payload):
+    """return (records, total or None) from one grid response"""
+    if isinstance(payload, list):
+        return payload, None
+    records = next((payload[k] for k in RECORD_KEYS if isinstance(payload.get(k), list)), [])
+    # ag-Grid sends lastRow = -1 while the row count is still unknown: not a total
+    total = next((v for v in map(payload.get, TOTAL_KEYS)
+                  if isinstance(v, int) and not isinstance(v, bool) and v >= 0), None)
+    return records, total
+
+def format_value(column, value):
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return "; ".join(str(v) for v in value)
+    value = str(value)
+    m = ISO_DATE.match(value) if column in DATE_COLUMNS else None
+    return f"{m[2]}/{m[3]}/{m[1]}" if m else value
+
+class GridEndpoint:
+    """The captured XHR behind the results grid, re-issued for any page."""
+
+    def __init__(self, url, method, params, body, columns):
+        self.url = url
+        self.method = method
+        self.params = params      # query string as a dict
+        self.body = body          # JSON body or None
+        self.columns = columns    # grid col-id → CSV header
+
+    @classmethod
+    def from_request(cls, request, columns):
+        parts = urlsplit(request.url)
+        body = None
+        if request.post_data:
+            try:
+                body = json.loads(request.post_data)
+            except ValueError:
+                pass
+        return cls(f"{parts.scheme}://{parts.netloc}{parts.path}", request.method,
+                   dict(parse_qsl(parts.query)), body, columns)
+
+    def for_page(self, index, size):
+        """(params, body) asking for page `index` (0-based) of `size` rows"""
+        params, body = dict(self.params), json.loads(json.dumps(self.body)) if self.body else None
+        for target in (t for t in (params, body) if isinstance(t, dict)):
+            for k in SIZE_KEYS:
+                if k in target:
+                    target[k] = size
+            for k in PAGE_KEYS:
+                if k in target:
+                    # keep the grid's own convention of 0- or 1-based pages
+                    target[k] = index + (1 if str(target[k]) == "1" else 0)
+            for k in OFFSET_KEYS:
+                if k in target:
+                    target[k] = index * size
+            if "endRow" in target:
+                target["endRow"] = (index + 1) * size
+        return params, body
+
+    def row(self, record):
+        by_header = {h: record.get(cid) for cid, h in self.columns.items()}
+        return [format_value(h, by_header.get(h, record.get(h))) for h in CSV_COLUMNS]
+
+    def to_json(self):
+        return {"url": self.url, "method": self.method, "params": self.params,
+                "body": self.body, "columns": self.columns}
+
+def iter_api_rows(endpoint, fetch, page_size):
+    """page the endpoint until the reported total (or an empty page) is reached"""
+    index, seen = 0, 0
+    while True:
+        params, body = endpoint.for_page(index, page_size)
+        records, total = extract_records(fetch(index, params, body))
+        print(f"  • page {index + 1}: {len(records)} rows")
+        metrics.count("rows", len(records))
+        for rec in records:
+            yield endpoint.row(rec)
+        seen += len(records)
+        if not records or (total is not None and seen >= total):
+            break
+        index += 1
+
+def capture_endpoint(page):
+    """load the search page and return the JSON request that filled the grid"""
+    responses = []
+    page.on("response", lambda r: responses.append(r)
+            if r.request.resource_type in ("xhr", "fetch") else None)
+    with metrics.span("page", url=SEARCH_URL):
+        page.goto(SEARCH_URL, wait_until="networkidle")
+        page.wait_for_selector('div[col-id="projectName"]')
+
+    columns = {}
+    for cell in page.query_selector_all('.ag-header-cell[col-id]'):
+        text = cell.inner_text().strip()
+        if text in CSV_COLUMNS:
+            columns[cell.get_attribute("col-id")] = text
+
+    for resp in responses:
+        if "json" not in resp.headers.get("content-type", ""):
+            continue
+        try:
+            records, _ = extract_records(resp.json())
+        except Exception:
+            continue
+        if records and isinstance(records[0], dict) and "projectName" in records[0]:
+            return GridEndpoint.from_request(resp.request, columns)
+    raise RuntimeError("could not find the grid's JSON request – try --mode ui")
+
+def download_api(browser, page_size, record_dir=None):
+    context = browser.new_context()
+    page    = context.new_page()
+
+    print("→ capturing grid request …")
+    endpoint = capture_endpoint(page)
+    print(f"  • {endpoint.method} {endpoint.url}")
+    if record_dir:
+        record_dir.mkdir(parents=True, exist_ok=True)
+        (record_dir / "endpoint.json").write_text(
+            json.dumps({**endpoint.to_json(), "page_size": page_size}, indent=2))
+
+    def fetch(index, params, body):
+        with metrics.span("http", method=endpoint.method, url=endpoint.url, page=index) as s:
+            resp = context.request.fetch(endpoint.url, method=endpoint.method,
+                                         params=params, data=body)
+            s["status"] = resp.status
+        with metrics.span("parse"):
+            payload = resp.json()
+        if record_dir:
+            (record_dir / f"page_{index:04d}.json").write_text(json.dumps(payload))
+        return payload
+
+    return iter_api_rows(endpoint, fetch, page_size)
+
+def replay_api(fixture_dir):
+    """page recorded responses offline (see --record)"""
+    meta = json.loads((fixture_dir / "endpoint.json").read_text())
+    endpoint = GridEndpoint(meta["url"], meta["method"], meta["params"],
+                            meta["body"], meta["columns"])
+
+    def fetch(index, params, body):
+        path = fixture_dir / f"page_{index:04d}.json"
+        with metrics.span("read", path=str(path)):
+            return json.loads(path.read_text()) if path.exists() else []
+
+    return iter_api_rows(endpoint, fetch, meta["page_size"])
+
+################################################################################
+# output -----------------------------------------------------------------------
+################################################################################
+
+def write_rows(rows, out_file):
+    """stream rows to disk with proper quoting; BOM keeps Excel happy"""
+    n = 0
+    with out_file.open("w", newline="", encoding="utf-8-sig") as fh:
+        writer = csv.writer(fh, quoting=csv.QUOTE_ALL)
+        writer.writerow(CSV_COLUMNS)
+        for row in rows:
+            writer.writerow(row)
+            n += 1
+    return n
+
+def main():
+    ap = argparse.ArgumentParser(description="Download active BLM ePlanning projects as CSV.")
+    ap.add_argument("-o", "--out", type=Path, default=OUT_FILE)
+    ap.add_argument("--mode", choices=("api", "ui"), default="api",
+                    help="api: page the grid's JSON endpoint directly; ui: click Download Results")
+    ap.add_argument("--page-size", type=int, default=API_PAGE_SIZE)
+    ap.add_argument("--record", type=Path, help="save api responses here as fixtures")
+    ap.add_argument("--replay", type=Path, help="build the CSV from recorded fixtures, no browser")
+    metrics.add_metrics_args(ap)
+    args = ap.parse_args()
+
+    with metrics.run("blm_download", args):
+        if args.replay:
+            n = write_rows(replay_api(args.replay), args.out)
+        else:
+            from playwright.sync_api import sync_playwright
+
+            with sync_playwright() as p:
+                browser = p.chromium.launch(headless=True)
+                if args.mode == "api":
+                    rows = download_api(browser, args.page_size, args.record)
+                else:
+                    rows = download_ui(browser)
+                n = write_rows(rows, args.out)
+                browser.close()
+
+        print(f"✅ merged {n} rows → {args.out.resolve()}")
 
 if __name__ == "__main__":
     # first-time users:   pip install playwright   &&   playwright install
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+build_tiles.py
+──────────────
+Cut the map layers into one MBTiles archive of gzipped Mapbox vector tiles
+(data/web/onx.mbtiles) that scripts/tile_server.py serves to web/index.html.
+
+* layers: BLM approved plans, USFS planning units, merged USFS forests
+  (same sources and kept attributes as build_web_layers.py)
+* geometry is projected to Web Mercator once, simplified per zoom to about
+  a pixel of the 4096-unit tile grid, clipped to each (buffered) tile
+* incremental: every tile stores a digest of the features it contains; on a
+  rebuild only tiles whose digest changed are re-encoded, tiles that no
+  longer hold anything are deleted
+
+USAGE (from project root)
+  python scripts/build_tiles.py [--maxzoom 9] [--full]
+requires: shapely>=2, mapbox-vector-tile>=2
+"""
+import argparse, gzip, hashlib, json, math, pathlib, sqlite3
+from collections import defaultdict
+
+import metrics
+from build_web_layers import LAYERS
+
+MBTILES = pathlib.Path("data/web/onx.mbtiles")
+MINZOOM, MAXZOOM = 0, 9
+EXTENT = 4096
+BUFFER = 64                       # tile units of overlap so strokes don't seam
+R = 6378137.0
+HALF_WORLD = math.pi * R
+MAX_LAT = 85.0511287798
+BUILD_VERSION = "1"               # bump when encoding options change → full rebuild
+
+
+def to_mercator(geom):
+    import numpy as np
+    import shapely
+
+    def fwd(coords):
+        lon = coords[:, 0]
+        lat = np.clip(coords[:, 1], -MAX_LAT, MAX_LAT)
+        x = np.radians(lon) * R
+        y = np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)) * R
+        return np.column_stack([x, y])
+    return shapely.transform(geom, fwd)
+
+
+def tile_size(z):
+    return 2 * HALF_WORLD / (1 << z)
+
+
+def tile_bounds(z, x, y):
+    """mercator (minx, miny, maxx, maxy) of XYZ tile"""
+    size = tile_size(z)
+    minx = -HALF_WORLD + x * size
+    maxy = HALF_WORLD - y * size
+    return minx, maxy - size, minx + size, maxy
+
+
+def tile_range(z, bbox):
+    minx, miny, maxx, maxy = bbox
+    size, n = tile_size(z), 1 << z
+    clamp = lambda v: min(max(int(v), 0), n - 1)
+    x0, x1 = clamp((minx + HALF_WORLD) // size), clamp((maxx + HALF_WORLD) // size)
+    y0, y1 = clamp((HALF_WORLD - maxy) // size), clamp((HALF_WORLD - miny) // size)
+    return range(x0, x1 + 1), range(y0, y1 + 1)
+
+
+def load_layer(spec):
+    """[(digest, mercator geometry, kept properties)] for one source file"""
+    from shapely.geometry import shape
+
+    with metrics.span("read", path=spec["src"]), open(spec["src"], encoding="utf-8") as fh:
+        features = json.load(fh)["features"]
+    out = []
+    with metrics.span("reproject", path=spec["src"], features=len(features)):
+        for f in features:
+            if not f.get("geometry"):
+                continue
+            props = {k: f["properties"][k] for k in spec["keep"]
+                     if f["properties"].get(k) is not None}
+            raw = json.dumps([f["geometry"], props], sort_keys=True).encode()
+            out.append((hashlib.sha1(raw).hexdigest(), to_mercator(shape(f["geometry"])), props))
+    return out
+
+
+def open_mbtiles(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(path)
+    db.executescript("""
+        CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS tiles (zoom_level INTEGER, tile_column INTEGER,
+            tile_row INTEGER, tile_data BLOB,
+            PRIMARY KEY (zoom_level, tile_column, tile_row));
+        CREATE TABLE IF NOT EXISTS tile_digests (zoom_level INTEGER, tile_column INTEGER,
+            tile_row INTEGER, digest TEXT,
+            PRIMARY KEY (zoom_level, tile_column, tile_row));
+    """)
+    return db
+
+
+def encode_tile(z, x, y, members, layers, simplified):
+    import mapbox_vector_tile
+    import shapely
+
+    minx, miny, maxx, maxy = bounds = tile_bounds(z, x, y)
+    buf = tile_size(z) * BUFFER / EXTENT
+    by_layer = defaultdict(list)
+    for name, i in members:
+        key = (name, i)
+        if key not in simplified:
+            geom = layers[name][i][1]
+            simplified[key] = geom.simplify(tile_size(z) / EXTENT, preserve_topology=True)
+        clipped = shapely.clip_by_rect(simplified[key], minx - buf, miny - buf, maxx + buf, maxy + buf)
+        if not clipped.is_empty:
+            by_layer[name].append({"geometry": clipped, "properties": layers[name][i][2]})
+    if not by_layer:
+        return None
+    pbf = mapbox_vector_tile.encode(
+        [{"name": name, "features": feats} for name, feats in by_layer.items()],
+        default_options={"quantize_bounds": bounds, "extents": EXTENT},
+    )
+    return gzip.compress(pbf)
+
+
+def build(mbtiles, minzoom, maxzoom, full=False):
+    layers = {}
+    for name, spec in LAYERS.items():
+        if pathlib.Path(spec["src"]).exists():
+            layers[name] = load_layer(spec)
+            print(f"[INFO] {name}: {len(layers[name])} features")
+        else:
+            print(f"[WARN] {name}: {spec['src']} missing – skipped")
+
+    db = open_mbtiles(mbtiles)
+    if full:
+        db.execute("DELETE FROM tiles")
+        db.execute("DELETE FROM tile_digests")
+    for table in ("tiles", "tile_digests"):
+        db.execute(f"DELETE FROM {table} WHERE zoom_level NOT BETWEEN ? AND ?", (minzoom, maxzoom))
+
+    written = unchanged = removed = 0
+    world = [float("inf"), float("inf"), float("-inf"), float("-inf")]
+    for z in range(minzoom, maxzoom + 1):
+        # tile → member features, from bounding boxes only (cheap)
+        members = defaultdict(list)
+        for name, feats in layers.items():
+            for i, (_, geom, _) in enumerate(feats):
+                bbox = geom.bounds
+                if z == minzoom:
+                    world = [min(world[0], bbox[0]), min(world[1], bbox[1]),
+                             max(world[2], bbox[2]), max(world[3], bbox[3])]
+                xs, ys = tile_range(z, bbox)
+                for x in xs:
+                    for y in ys:
+                        members[(x, y)].append((name, i))
+
+        stored = {(x, (1 << z) - 1 - row): d for x, row, d in db.execute(
+            "SELECT tile_column, tile_row, digest FROM tile_digests WHERE zoom_level = ?", (z,))}
+        simplified = {}
+        for (x, y), mem in members.items():
+            h = hashlib.sha1(BUILD_VERSION.encode())
+            for key in sorted(f"{name}:{layers[name][i][0]}" for name, i in mem):
+                h.update(key.encode())
+            digest = h.hexdigest()
+            if stored.pop((x, y), None) == digest:
+                unchanged += 1
+                continue
+            row = (1 << z) - 1 - y                       # MBTiles rows are TMS (y up)
+            with metrics.span("encode", z=z, x=x, y=y) as s:
+                data = encode_tile(z, x, y, mem, layers, simplified)
+                s["bytes"] = len(data) if data else 0
+            metrics.count("tiles.bytes", len(data) if data else 0)
+            if data is None:
+                db.execute("DELETE FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+                           (z, x, row))
+            else:
+                db.execute("INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)", (z, x, row, data))
+                written += 1
+            db.execute("INSERT OR REPLACE INTO tile_digests VALUES (?, ?, ?, ?)", (z, x, row, digest))
+        # whatever is left in `stored` has no features any more
+        for x, y in stored:
+            row = (1 << z) - 1 - y
+            for table in ("tiles", "tile_digests"):
+                db.execute(f"DELETE FROM {table} WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+                           (z, x, row))
+            removed += 1
+        with metrics.span("write", z=z):
+            db.commit()
+        print(f"[INFO] z{z}: {len(members)} tiles")
+
+    lon = lambda mx: math.degrees(mx / R)
+    lat = lambda my: math.degrees(2 * math.atan(math.exp(my / R)) - math.pi / 2)
+    bounds = [lon(world[0]), lat(world[1]), lon(world[2]), lat(world[3])] if layers else [-180, -85, 180, 85]
+    meta = {
+        "name": "onx", "format": "pbf", "type": "overlay",
+        "minzoom": str(minzoom), "maxzoom": str(maxzoom),
+        "bounds": ",".join(f"{v:.5f}" for v in bounds),
+        "center": f"{(bounds[0] + bounds[2]) / 2:.5f},{(bounds[1] + bounds[3]) / 2:.5f},{minzoom + 3}",
+        "json": json.dumps({"vector_layers": [
+            {"id": name, "fields": {k: "String" for k in LAYERS[name]["keep"]},
+             "minzoom": minzoom, "maxzoom": maxzoom} for name in layers]}),
+    }
+    db.executemany("INSERT OR REPLACE INTO metadata VALUES (?, ?)", meta.items())
+    db.commit()
+    db.close()
+    return written, unchanged, removed
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build the vector-tile archive for the web map.")
+    ap.add_argument("-o", "--out", type=pathlib.Path, default=MBTILES)
+    ap.add_argument("--minzoom", type=int, default=MINZOOM)
+    ap.add_argument("--maxzoom", type=int, default=MAXZOOM)
+    ap.add_argument("--full", action="store_true", help="ignore stored digests and rebuild every tile")
+    metrics.add_metrics_args(ap)
+    args = ap.parse_args()
+
+    with metrics.run("build_tiles", args):
+        written, unchanged, removed = build(args.out, args.minzoom, args.maxzoom, args.full)
+        metrics.count("tiles.written", written)
+        metrics.count("tiles.unchanged", unchanged)
+        metrics.count("tiles.removed", removed)
+    print(f"[DONE] {args.out}: {written} tiles written, {unchanged} unchanged, {removed} removed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+build_web_layers.py
+───────────────────
+Write simplified, coordinate-quantized copies of the map layers at several
+zoom levels so web/index.html can paint a coarse version first and swap in
+finer ones as the user zooms.
+
+  data/web/<layer>/z<minzoom>.geojson     one file per level
+  data/web/manifest.json                  levels + byte sizes for the page
+
+Layers that tile the map (forests, planning units) are treated as a polygon
+coverage: repaired and cleaned once (shapely.coverage_clean snaps near-shared
+edges together and hands digitizing overlaps to one side), then simplified as
+a whole with shapely.coverage_simplify, so a border shared by two polygons is
+simplified once and stays shared – no gaps or slivers at coarse zooms.  Layers
+that overlap by design (land use plans and their amendments), or a coverage
+that still isn't valid after cleaning, fall back to per-feature
+topology-preserving Douglas–Peucker, which keeps each ring valid but lets
+neighbouring borders drift apart.  Coordinates are then snapped to a grid of
+10^-decimals degrees and written with that many decimals.
+Only the properties the page's popups and filters read are kept.
+
+USAGE (from project root)
+  python scripts/build_web_layers.py [--layers blm-plans fs-units usfs-forests]
+"""
+import argparse, json, pathlib
+
+import metrics
+from geojson_stream import FeatureCollectionWriter
+
+OUT_DIR = pathlib.Path("data/web")
+
+# (min zoom, simplify tolerance in degrees, decimals kept)
+LEVELS = [
+    (0, 0.02, 3),
+    (6, 0.004, 4),
+    (9, 0.0008, 5),
+]
+
+LAYERS = {
+    "blm-plans": {
+        "src": "data/outputs/approved_land_use_plans.geojson",
+        "keep": ["LUPName", "NEPAnum", "MapType", "AdminSt", "Status", "RODdate", "ePLink"],
+        "coverage": False,          # amendments overlap their RMP
+    },
+    "fs-units": {
+        "src": "data/outputs/fs_planning_units.geojson",
+        "keep": ["PLANNINGUNIT", "STATES", "PLANNINGUNITTYPE", "LATESTREVISIONCOMPLETIONYEAR",
+                 "PLANNINGRULESHORT", "LINKTOCURRENTPLAN"],
+        "coverage": True,
+    },
+    "usfs-forests": {
+        "src": "data/processed/usfs_merged.geojson",
+        "keep": ["FORESTNAME", "FORESTNAME_clean", "type", "title", "comments_close_on",
+                 "days_left", "html_url"],
+        "coverage": True,
+    },
+}
+
+
+def round_coords(coords, decimals):
+    if isinstance(coords[0], (int, float)):
+        return [round(c, decimals) for c in coords]
+    return [round_coords(c, decimals) for c in coords]
+
+
+def as_coverage(geoms):
+    """geoms repaired and cleaned into a valid polygon coverage (nulls stay null),
+    or None if they can't be"""
+    import shapely
+
+    present = ~shapely.is_missing(geoms)
+    fixed = shapely.make_valid(geoms[present], method="structure", keep_collapsed=False)
+    types = shapely.get_type_id(fixed)
+    if not len(fixed) or not ((types == 3) | (types == 6)).all():
+        return None
+    if hasattr(shapely, "coverage_clean"):          # shapely ≥ 2.2 / GEOS ≥ 3.14
+        fixed = shapely.coverage_clean(fixed)
+    if not shapely.coverage_is_valid(fixed):
+        return None
+    out = geoms.copy()
+    out[present] = fixed
+    return out
+
+
+def simplify_layer(geoms, tolerance, coverage):
+    """simplified copy of a geometry array (nulls stay null)"""
+    import shapely
+
+    if not coverage:
+        return shapely.simplify(geoms, tolerance, preserve_topology=True)
+    out = geoms.copy()
+    present = ~shapely.is_missing(geoms)
+    out[present] = shapely.coverage_simplify(geoms[present], tolerance)
+    return out
+
+
+def generalize(simple, decimals):
+    """grid-snapped GeoJSON geometry dict of a simplified geometry, or None if it collapsed"""
+    import shapely
+    from shapely.geometry import mapping
+
+    snapped = shapely.set_precision(simple, 10 ** -decimals)
+    if snapped.is_empty:
+        return None
+    out = mapping(snapped)
+    if "coordinates" in out:
+        out = {"type": out["type"], "coordinates": round_coords(out["coordinates"], decimals)}
+    return out
+
+
+def build_layer(name, spec, out_dir):
+    import numpy as np
+    from shapely.geometry import shape
+
+    src = pathlib.Path(spec["src"])
+    with metrics.span("read", path=str(src)), src.open(encoding="utf-8") as fh:
+        features = json.load(fh)["features"]
+    with metrics.span("parse", layer=name, features=len(features)):
+        geoms = np.array([shape(f["geometry"]) if f.get("geometry") else None for f in features],
+                         dtype=object)
+    coverage = False
+    if spec["coverage"]:
+        with metrics.span("coverage", layer=name) as s:
+            cleaned = as_coverage(geoms)
+            s["valid"] = coverage = cleaned is not None
+        if coverage:
+            geoms = cleaned
+        else:
+            print(f"[WARN] {name}: not a valid polygon coverage even after cleaning – "
+                  "simplified one by one, shared borders may not line up")
+    props = [{k: f["properties"].get(k) for k in spec["keep"] if k in f["properties"]}
+             for f in features]
+
+    levels = []
+    for min_zoom, tolerance, decimals in LEVELS:
+        path = out_dir / name / f"z{min_zoom}.geojson"
+        with metrics.span("simplify", layer=name, minzoom=min_zoom), FeatureCollectionWriter(path) as out:
+            for geom, p in zip(simplify_layer(geoms, tolerance, coverage), props):
+                g = generalize(geom, decimals) if geom is not None else None
+                if g is not None:
+                    out.write({"type": "Feature", "properties": p, "geometry": g})
+        levels.append({"minzoom": min_zoom, "url": path.as_posix(), "bytes": path.stat().st_size,
+                       "features": out.count})
+    return {"source_bytes": src.stat().st_size, "levels": levels}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[2])
+    ap.add_argument("--layers", nargs="+", choices=list(LAYERS), default=list(LAYERS))
+    ap.add_argument("-o", "--out-dir", type=pathlib.Path, default=OUT_DIR)
+    metrics.add_metrics_args(ap)
+    args = ap.parse_args()
+
+    with metrics.run("build_web_layers", args):
+        manifest_path = args.out_dir / "manifest.json"
+        manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+        for name in args.layers:
+            if not pathlib.Path(LAYERS[name]["src"]).exists():
+                print(f"[WARN] {name}: {LAYERS[name]['src']} missing – skipped")
+                continue
+            info = build_layer(name, LAYERS[name], args.out_dir)
+            manifest[name] = info
+            src = info["source_bytes"]
+            print(f"[INFO] {name}: source {src / 1e6:.2f} MB")
+            for lvl in info["levels"]:
+                print(f"         z{lvl['minzoom']:<2} {lvl['bytes'] / 1e6:8.2f} MB "
+                      f"({100 * (1 - lvl['bytes'] / src):5.1f}% smaller)")
+
+        args.out_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path.write_text(json.dumps(manifest, indent=2))
+        print(f"[DONE] wrote {manifest_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+columnar.py
+───────────
+Parquet / GeoParquet I/O for the intermediates in data/processed.
+
+Tables go to Parquet and spatial layers to GeoParquet, both zstd-compressed
+and with explicit column types, so the next stage reads typed columns (and
+only the ones it asks for) instead of re-parsing CSV text or GeoJSON
+coordinates.  CSV and GeoJSON remain the export formats: every reader and
+writer here dispatches on the file suffix, so passing a .csv/.geojson path
+still works.
+
+USAGE (from project root)
+  python scripts/columnar.py                     # convert the legacy intermediates
+  python scripts/columnar.py SRC DST [--schema fr_notices]
+requires: pandas, pyarrow (+ geopandas for layers)
+"""
+import argparse, os, pathlib
+
+import metrics
+
+COMPRESSION = "zstd"
+LAYER_SUFFIXES = (".geojson", ".json", ".gpkg", ".shp")
+
+# explicit column types – dates stay ISO strings: they are re-emitted verbatim downstream
+SCHEMAS = {
+    "fr_notices": {
+        "document_number": "string", "title": "string", "admin unit": "string",
+        "type": "category", "publication_date": "string", "comments_close_on": "string",
+        "comment_url": "string", "html_url": "string", "docket_ids": "string",
+        "days_left": "Int64", "lon": "float64", "lat": "float64",
+    },
+    "forest_centroids": {"FORESTNAME": "string", "lon": "float64", "lat": "float64"},
+    "blm_projects": {
+        "NEPA #": "string", "Type": "category", "Project Name": "string",
+        "Lead Office": "category", "Program": "category", "NEPA Status": "category",
+        "Document/Map Name": "string", "Days Left": "string", "Fiscal Year": "Int64",
+        "NOI Date": "string", "Decision Date": "string", "FONSI Date": "string",
+        "Latitude": "float64", "Longitude": "float64", "url": "string",
+    },
+}
+
+# columns a stage reads back even when its input had none (e.g. an empty notice
+# CSV): write_table adds them empty.  Any other schema column is only cast if present.
+REQUIRED = {
+    "fr_notices": ["admin unit", "title", "type", "comments_close_on", "days_left", "html_url",
+                   "lon", "lat"],
+    "forest_centroids": ["FORESTNAME", "lon", "lat"],
+}
+
+# legacy text intermediate → (columnar replacement, schema or None for a layer).
+# The forests come from the clean outputs/ export: data/processed/usfs_selected_forests.geojson
+# is an earlier merged output and still carries that run's notice properties.
+MIGRATIONS = [
+    ("data/outputs/usfs_selected_forests.geojson", "data/processed/usfs_selected_forests.parquet", None),
+    ("data/processed/usfs_selected_forests.csv", "data/processed/usfs_forest_centroids.parquet",
+     "forest_centroids"),
+    ("data/processed/usfs_comments_with_coords.csv", "data/processed/usfs_comments_with_coords.parquet",
+     "fr_notices"),
+]
+
+
+def is_columnar(path) -> bool:
+    return pathlib.Path(path).suffix.lower() in (".parquet", ".geoparquet")
+
+
+def apply_schema(df, schema, required=()):
+    """cast the schema columns present in df, in place order; `required` ones
+    that are missing are appended empty"""
+    import pandas as pd
+
+    if not schema:
+        return df
+    df = df.rename(columns=lambda c: c.strip() if isinstance(c, str) else c)
+    for col, dtype in schema.items():
+        if col not in df.columns:
+            if col in required:
+                df[col] = pd.Series(index=df.index, dtype=dtype)
+        elif dtype == "Int64":
+            df[col] = pd.to_numeric(df[col], errors="coerce").round().astype(dtype)
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def read_table(path, columns=None, schema=None):
+    """DataFrame from Parquet (reads only `columns`) or CSV"""
+    import pandas as pd
+
+    if isinstance(schema, str):
+        schema = SCHEMAS[schema]
+    with metrics.span("read", path=str(path)) as s:
+        if is_columnar(path):
+            df = pd.read_parquet(path, columns=columns)
+        else:
+            df = pd.read_csv(path, usecols=columns)
+            if schema:
+                df = apply_schema(df, schema)
+        s["rows"] = len(df)
+    return df
+
+
+def _replace_into(path, write):
+    """write to <path>.part, then rename over `path` so readers never see half a file"""
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".part")
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def write_table(df, path, schema=None):
+    required = ()
+    if isinstance(schema, str):
+        schema, required = SCHEMAS[schema], REQUIRED.get(schema, ())
+    df = apply_schema(df, schema, required)
+    with metrics.span("write", path=str(path), rows=len(df)):
+        if is_columnar(path):
+            _replace_into(path, lambda tmp: df.to_parquet(tmp, compression=COMPRESSION, index=False))
+        else:
+            _replace_into(path, lambda tmp: df.to_csv(tmp, index=False))
+    return df
+
+
+def read_layer(path, columns=None, bbox=None):
+    """GeoDataFrame from GeoParquet or any OGR source; `columns` excludes geometry"""
+    import geopandas as gpd
+
+    with metrics.span("read", path=str(path)) as s:
+        if is_columnar(path):
+            cols = None if columns is None else list(columns) + ["geometry"]
+            gdf = gpd.read_parquet(path, columns=cols, bbox=bbox)
+        else:
+            gdf = gpd.read_file(path, columns=columns, bbox=bbox)
+        s["rows"] = len(gdf)
+    return gdf
+
+
+def write_layer(gdf, path):
+    with metrics.span("write", path=str(path), rows=len(gdf)):
+        if is_columnar(path):
+            # the per-row bbox column lets readers skip row groups outside a bbox
+            _replace_into(path, lambda tmp: gdf.to_parquet(
+                tmp, compression=COMPRESSION, index=False, write_covering_bbox=True))
+        else:
+            _replace_into(path, lambda tmp: gdf.to_file(tmp, driver="GeoJSON"))
+
+
+def iter_features(path):
+    """GeoJSON-like feature dicts from a .geojson file or a GeoParquet layer"""
+    if is_columnar(path):
+        import pandas as pd
+
+        # back to what the GeoJSON carried: ISO date strings and plain lists
+        gdf = read_layer(path)
+        for col in gdf.columns.drop(gdf.geometry.name):
+            if pd.api.types.is_datetime64_any_dtype(gdf[col]):
+                days = gdf[col].dropna()
+                fmt = "%Y-%m-%d" if (days == days.dt.normalize()).all() else "%Y-%m-%dT%H:%M:%S"
+                gdf[col] = gdf[col].dt.strftime(fmt).astype(object).where(gdf[col].notna(), None)
+            elif gdf[col].dtype == object:
+                gdf[col] = gdf[col].map(lambda v: v.tolist() if hasattr(v, "tolist") else v)
+        yield from gdf.iterfeatures(na="null", drop_id=True)
+        return
+    from geojson_stream import read_features
+    yield from read_features(path)
+
+
+def is_layer(path) -> bool:
+    path = pathlib.Path(path)
+    if is_columnar(path):
+        import pyarrow.parquet as pq
+        return b"geo" in (pq.read_schema(path).metadata or {})
+    return path.suffix.lower() in LAYER_SUFFIXES
+
+
+def convert(src, dst, schema=None):
+    src, dst = pathlib.Path(src), pathlib.Path(dst)
+    if is_layer(src):
+        write_layer(read_layer(src), dst)
+    else:
+        write_table(read_table(src), dst, schema)
+    print(f"[INFO] {src} ({src.stat().st_size / 1e6:.2f} MB) → {dst} ({dst.stat().st_size / 1e6:.2f} MB)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Convert intermediates to Parquet/GeoParquet (or back).")
+    ap.add_argument("src", nargs="?")
+    ap.add_argument("dst", nargs="?")
+    ap.add_argument("--schema", choices=list(SCHEMAS), help="column types for a table")
+    metrics.add_metrics_args(ap)
+    args = ap.parse_args()
+
+    if args.src and not args.dst:
+        ap.error("DST is required with SRC")
+    with metrics.run("columnar", args):
+        if args.src:
+            convert(args.src, args.dst, args.schema)
+            return
+        for src, dst, schema in MIGRATIONS:
+            if pathlib.Path(src).exists():
+                convert(src, dst, schema)
+            else:
+                print(f"[WARN] {src} missing – skipped")
+    print("[DONE] columnar intermediates written")
+
+if __name__ == "__main__":
+    main()
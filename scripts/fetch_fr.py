@@ -3,9 +3,19 @@
 fetch_usfs_open_fr.py
 Pull Forest Service Federal Register notices that are STILL OPEN for public comment.
 Output → data/raw/usfs_open_comments_YYYY-MM-DD.csv
+
+Only notices published in the last --lookback-days are requested (comment
+periods don't stay open longer than that), and pages are fetched concurrently
+over one pooled session.  With --incremental only notices published since the
+last successful sync are requested; the still-open ones from earlier syncs
+are carried over from the state file.
 """
 
-import csv, datetime as dt, pathlib, requests, sys
+import argparse, csv, datetime as dt, json, pathlib
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from rest_client import RestClient, add_client_args
 
 BASE = "https://www.federalregister.gov/api/v1/documents.json"
 AGENCY  = "forest-service"          # you could also use agency_ids[]=31
@@ -14,50 +24,104 @@ FIELDS = [
     "document_number","title","type","publication_date",
     "comments_close_on","comment_url","html_url","docket_ids"
 ]
+LOOKBACK_DAYS = 180                 # oldest publication date worth asking for
+WORKERS = 4
+STATE_FILE = pathlib.Path("data/raw/.fr_sync_state.json")
 
-def page_query(page: int) -> list[dict]:
+def page_query(client: RestClient, page: int, since: dt.date) -> dict:
     params = [
         ("per_page", PER_PAGE),
         ("order", "newest"),
         ("conditions[agencies][]", AGENCY),
         ("conditions[type][]", "NOTICE"),     # add PRORULE or RULE if you need them too
+        ("conditions[publication_date][gte]", since.isoformat()),
         ("page", page)
     ]
     # one fields[]= param **per field**  – that’s what the FR API expects
     params.extend([("fields[]", f) for f in FIELDS])
-    r = requests.get(BASE, params=params, timeout=30)
-    r.raise_for_status()
-    return r.json()
-
-def fetch_open_docs(today: dt.date):
-    docs, page = [], 1
-    while True:
-        data = page_query(page)
-        for d in data["results"]:
-            end = d.get("comments_close_on")
-            if end and dt.date.fromisoformat(end) >= today:
-                d["days_left"] = (dt.date.fromisoformat(end) - today).days
-                docs.append(d)
-        if not data.get("next_page_url"):
-            break
-        page += 1
+    return client.get_json(BASE, params=params)
+
+def fetch_docs(client: RestClient, since: dt.date, workers: int = WORKERS) -> list[dict]:
+    """every notice published on/after `since`; pages 2..N are fetched in parallel"""
+    first = page_query(client, 1, since)
+    docs = list(first["results"])
+    total_pages = first.get("total_pages") or 1
+    if total_pages > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for data in pool.map(lambda p: page_query(client, p, since), range(2, total_pages + 1)):
+                docs.extend(data["results"])
+    metrics.count("records.fetched", len(docs))
+    return docs
+
+def open_docs(docs, today: dt.date) -> list[dict]:
+    out = []
+    for d in docs:
+        end = d.get("comments_close_on")
+        if end and dt.date.fromisoformat(end) >= today:
+            d["days_left"] = (dt.date.fromisoformat(end) - today).days
+            out.append(d)
+    return out
+
+def fetch_open_docs(client: RestClient, today: dt.date,
+                    lookback_days: int = LOOKBACK_DAYS, workers: int = WORKERS):
+    return open_docs(fetch_docs(client, today - dt.timedelta(days=lookback_days), workers), today)
+
+def sync_open_docs(client: RestClient, today: dt.date, state_path: pathlib.Path,
+                   lookback_days: int = LOOKBACK_DAYS, workers: int = WORKERS):
+    """incremental fetch: only what was published since the last recorded sync"""
+    state = json.loads(state_path.read_text()) if state_path.exists() else {}
+    if "last_sync" in state:
+        # one day of overlap catches notices published later on the sync day
+        since = dt.date.fromisoformat(state["last_sync"]) - dt.timedelta(days=1)
+    else:
+        since = today - dt.timedelta(days=lookback_days)
+    print(f"[INFO] requesting notices published since {since}")
+
+    known = {d["document_number"]: d for d in state.get("open_docs", [])}
+    for d in fetch_docs(client, since, workers):
+        known[d["document_number"]] = d
+    docs = open_docs(known.values(), today)
+
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    state_path.write_text(json.dumps({"last_sync": today.isoformat(), "open_docs": docs}))
     return docs
 
 def write_csv(rows, path):
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", newline="", encoding="utf-8") as fh:
-        writer = csv.DictWriter(fh, fieldnames=rows[0].keys())
+    with metrics.span("write", path=str(path), rows=len(rows)), \
+            path.open("w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=FIELDS + ["days_left"])
         writer.writeheader()
         writer.writerows(rows)
     print(f"✓ saved {len(rows)} open Forest Service dockets → {path}")
+    metrics.count("records.written", len(rows))
 
 def main():
-    today = dt.date.today()
-    docs = fetch_open_docs(today)
-    if not docs:
-        sys.exit("No Forest Service comment periods are currently open.")
-    out = pathlib.Path("data/raw") / f"usfs_open_comments_{today}.csv"
-    write_csv(docs, out)
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    ap.add_argument("--lookback-days", type=int, default=LOOKBACK_DAYS,
+                    help="ignore notices published more than this many days ago")
+    ap.add_argument("--workers", type=int, default=WORKERS, help="concurrent page requests")
+    ap.add_argument("--incremental", action="store_true",
+                    help="only request notices published since the last sync")
+    ap.add_argument("--state", type=pathlib.Path, default=STATE_FILE)
+    ap.add_argument("-o", "--out", type=pathlib.Path,
+                    help="output CSV (default data/raw/usfs_open_comments_<today>.csv)")
+    add_client_args(ap)
+    metrics.add_metrics_args(ap)
+    args = ap.parse_args()
+
+    with metrics.run("fetch_fr", args):
+        client = RestClient.from_args(args, pool_size=args.workers)
+        today = dt.date.today()
+        if args.incremental:
+            docs = sync_open_docs(client, today, args.state, args.lookback_days, args.workers)
+        else:
+            docs = fetch_open_docs(client, today, args.lookback_days, args.workers)
+        if not docs:
+            # a quiet day, not a failure: downstream stages get an empty (header-only) table
+            print("[WARN] No Forest Service comment periods are currently open.")
+        out = args.out or pathlib.Path("data/raw") / f"usfs_open_comments_{today}.csv"
+        write_csv(docs, out)
 
 if __name__ == "__main__":
     main()
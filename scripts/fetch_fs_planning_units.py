@@ -1,55 +1,137 @@
-import requests
-import json
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import requests
+
+import metrics
+from geojson_stream import FeatureCollectionWriter, output_path
+from rest_client import ArcGISError, RestClient, add_client_args
+
 BASE_URL = "https://apps.fs.usda.gov/arcx/rest/services/EDW/EDW_LandManagementPlanningUnit_01/MapServer/0"
 OUT_PATH = Path("data/outputs/fs_planning_units.geojson")
-CHUNK_SIZE = 50
+CHUNK_SIZE = 50          # starting chunk size; capped by the layer's maxRecordCount
+WORKERS = 4
+
+
+class TransferLimitExceeded(Exception):
+    """The server truncated a chunk; it has to be split, not retried."""
+
+
+# failures worth retrying as two half-size chunks: truncated, rejected or too slow
+# to generate.  RestClient retries transport errors and 429/5xx at the same size
+# first; only what survives that (a 5xx surfaces as HTTPError) is split.
+SPLIT_ON = (TransferLimitExceeded, ArcGISError, requests.Timeout, requests.HTTPError, ValueError)
 
-def get_all_object_ids():
+
+def payload_failure(e):
+    """a server-side failure a smaller chunk may avoid (not a 4xx or a throttle)"""
+    if isinstance(e, requests.HTTPError):
+        status = getattr(e.response, "status_code", None)
+        return status is not None and status >= 500
+    return True
+
+
+def get_layer_info(client):
+    return client.get_json(BASE_URL, params={"f": "json"})
+
+def get_all_object_ids(client):
     params = {
         "where": "1=1",
         "returnIdsOnly": "true",
         "f": "json"
     }
-    r = requests.get(f"{BASE_URL}/query", params=params)
-    r.raise_for_status()
-    return r.json().get("objectIds", [])
+    return sorted(client.get_json(f"{BASE_URL}/query", params=params).get("objectIds") or [])
 
-def fetch_chunk(object_ids):
+def fetch_chunk(client, object_ids):
+    """Return (features, bytes) for one chunk (RestClient retries 429/5xx with backoff)."""
     params = {
         "objectIds": ",".join(map(str, object_ids)),
         "outFields": "*",
         "returnGeometry": "true",
         "f": "geojson"
     }
-    r = requests.get(f"{BASE_URL}/query", params=params)
-    r.raise_for_status()
-    return r.json().get("features", [])
+    # POST keeps long objectIds lists out of the URL
+    r = client.post(f"{BASE_URL}/query", data=params)
+    data = client.parse_json(r)  # raises ArcGISError on an HTTP 200 error body
+    if data.get("exceededTransferLimit") or data.get("properties", {}).get("exceededTransferLimit"):
+        raise TransferLimitExceeded()
+    return data.get("features", []), len(r.content)
 
-def main():
-    print("[INFO] Getting OBJECTIDs…")
-    object_ids = get_all_object_ids()
-    print(f"[INFO] Found {len(object_ids)} records.")
+def fetch_chunk_adaptive(client, object_ids):
+    """fetch_chunk, halving the chunk when the payload is the problem (oversized/slow)"""
+    try:
+        return fetch_chunk(client, object_ids)
+    except SPLIT_ON as e:
+        if len(object_ids) == 1 or client.offline or not payload_failure(e):
+            raise
+        mid = len(object_ids) // 2
+        metrics.count("chunk.splits")
+        print(f"[WARN] chunk {object_ids[0]}–{object_ids[-1]} failed ({type(e).__name__}); splitting in two")
+        left, lb = fetch_chunk_adaptive(client, object_ids[:mid])
+        right, rb = fetch_chunk_adaptive(client, object_ids[mid:])
+        return left + right, lb + rb
+
+def iter_features(client, object_ids, chunk_size, workers, id_field="OBJECTID", stats=None):
+    """Yield features in objectid order while up to `workers` chunks are in flight."""
+    chunks = [object_ids[i:i + chunk_size] for i in range(0, len(object_ids), chunk_size)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # bounded look-ahead keeps at most 2×workers chunks in memory
+        pending = []
+        it = iter(chunks)
+        for chunk in it:
+            pending.append(pool.submit(fetch_chunk_adaptive, client, chunk))
+            if len(pending) >= 2 * workers:
+                break
+        done = 0
+        while pending:
+            features, nbytes = pending.pop(0).result()
+            nxt = next(it, None)
+            if nxt is not None:
+                pending.append(pool.submit(fetch_chunk_adaptive, client, nxt))
+            done += 1
+            metrics.count("features", len(features))
+            if stats is not None:
+                stats["bytes"] += nbytes
+                stats["features"] += len(features)
+            print(f"[INFO] chunk {done}/{len(chunks)}: {len(features)} features")
+            features.sort(key=lambda f: f.get("id", f.get("properties", {}).get(id_field, 0)))
+            yield from features
 
-    all_features = []
+def main():
+    ap = argparse.ArgumentParser(description="Fetch USFS land-management planning units as GeoJSON.")
+    ap.add_argument("-o", "--out", type=Path, default=OUT_PATH)
+    ap.add_argument("--workers", type=int, default=WORKERS, help="concurrent chunk requests")
+    ap.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    ap.add_argument("--ndjson", action="store_true", help="write newline-delimited GeoJSON")
+    add_client_args(ap)
+    metrics.add_metrics_args(ap)
+    args = ap.parse_args()
 
-    for i in range(0, len(object_ids), CHUNK_SIZE):
-        chunk_ids = object_ids[i:i + CHUNK_SIZE]
-        print(f"[INFO] Fetching records {i + 1}–{i + len(chunk_ids)}")
-        features = fetch_chunk(chunk_ids)
-        all_features.extend(features)
+    with metrics.run("fetch_fs_planning_units", args):
+        # a chunk that times out is split at once rather than re-sent whole 4 more times
+        client = RestClient.from_args(args, pool_size=args.workers, read_retries=0)
+        info = get_layer_info(client)
+        max_records = info.get("maxRecordCount") or 1000
+        chunk_size = max(1, min(args.chunk_size, max_records))
+        id_field = info.get("objectIdField") or "OBJECTID"
 
-    feature_collection = {
-        "type": "FeatureCollection",
-        "features": all_features
-    }
+        print("[INFO] Getting OBJECTIDs…")
+        object_ids = get_all_object_ids(client)
+        print(f"[INFO] Found {len(object_ids)} records "
+              f"(chunks of {chunk_size}, maxRecordCount {max_records}, {args.workers} workers).")
 
-    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(OUT_PATH, "w") as f:
-        json.dump(feature_collection, f)
+        out_path = output_path(args.out, args.ndjson)
+        stats = {"bytes": 0, "features": 0}
+        start = time.perf_counter()
+        with FeatureCollectionWriter(out_path, ndjson=args.ndjson) as out:
+            out.write_all(iter_features(client, object_ids, chunk_size, args.workers, id_field, stats))
+        elapsed = max(time.perf_counter() - start, 1e-9)
 
-    print(f"[DONE] Wrote {len(all_features)} features to {OUT_PATH}")
+        print(f"[DONE] Wrote {out.count} features to {out_path}")
+        print(f"[DONE] {elapsed:.1f}s · {stats['features'] / elapsed:.1f} features/s · "
+              f"{stats['bytes'] / elapsed / 1e6:.2f} MB/s")
 
 if __name__ == "__main__":
     main()
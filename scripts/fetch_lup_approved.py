@@ -1,7 +1,58 @@
-import requests
-import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+import metrics
+from geojson_stream import FeatureCollectionWriter, output_path
+from rest_client import RestClient, add_client_args
+
+BASE_URL = "https://services1.arcgis.com/KbxwQRRfWyEYLgp4/arcgis/rest/services/BLM_Natl_Land_Use_Plans_Approved_2022/FeatureServer/1/query"
+OUT_PATH = Path("data/outputs/approved_land_use_plans.geojson")
+WEB_OUT_PATH = Path("data/outputs/approved_land_use_plans_web.geojson")
+PAGE_SIZE = 1000
+WORKERS = 4
+TIMEOUT = 120            # full-resolution pages of big plans are slow to generate
+
+# --web preset: ~100 m generalization, 5 decimals (~1 m) is plenty for display
+WEB_MAX_OFFSET = 0.001
+WEB_PRECISION = 5
+
+def ring_area(ring):
+    """signed shoelace area; ArcGIS outer rings are clockwise (negative)"""
+    return sum(x1 * y2 - x2 * y1 for (x1, y1, *_), (x2, y2, *_) in zip(ring, ring[1:])) / 2
+
+def point_in_ring(pt, ring):
+    x, y = pt[0], pt[1]
+    inside = False
+    for (x1, y1, *_), (x2, y2, *_) in zip(ring, ring[1:]):
+        if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+            inside = not inside
+    return inside
+
+def rings_to_polygons(rings):
+    """
+    Group ArcGIS rings into GeoJSON polygons: every clockwise ring starts a
+    polygon, every counter-clockwise ring is a hole of the smallest outer ring
+    that contains it (an island inside a hole inside a shell must not get the
+    island's neighbour hole).  Orientation is flipped to the RFC 7946
+    right-hand rule.
+    """
+    outers, holes = [], []
+    for ring in rings:
+        if len(ring) < 4:
+            continue
+        (outers if ring_area(ring) < 0 else holes).append(ring)
+
+    polygons = [[outer[::-1]] for outer in outers]
+    areas = [-ring_area(outer) for outer in outers]
+    for hole in holes:
+        containing = [i for i, outer in enumerate(outers) if point_in_ring(hole[0], outer)]
+        if containing:
+            polygons[min(containing, key=areas.__getitem__)].append(hole[::-1])
+        else:
+            polygons.append([hole])      # orphan hole: really an outer ring in CCW order
+    return polygons
+
 def arcgis_to_geojson_feature(feature):
     geometry = feature.get("geometry")
     attributes = feature.get("attributes")
@@ -11,14 +62,25 @@ def arcgis_to_geojson_feature(feature):
 
     # Handle polygon geometry
     if "rings" in geometry:
-        geojson_geom = {
-            "type": "Polygon",
-            "coordinates": geometry["rings"]
-        }
+        polygons = rings_to_polygons(geometry["rings"])
+        if not polygons:
+            return None
+        geojson_geom = (
+            {"type": "Polygon", "coordinates": polygons[0]} if len(polygons) == 1
+            else {"type": "MultiPolygon", "coordinates": polygons}
+        )
     elif "paths" in geometry:
+        paths = geometry["paths"]
+        if not paths:
+            return None
+        geojson_geom = (
+            {"type": "LineString", "coordinates": paths[0]} if len(paths) == 1
+            else {"type": "MultiLineString", "coordinates": paths}
+        )
+    elif "points" in geometry:
         geojson_geom = {
-            "type": "LineString",
-            "coordinates": geometry["paths"][0]
+            "type": "MultiPoint",
+            "coordinates": geometry["points"]
         }
     elif "x" in geometry and "y" in geometry:
         geojson_geom = {
@@ -34,53 +96,78 @@ def arcgis_to_geojson_feature(feature):
         "properties": attributes
     }
 
-def fetch_all_features():
-    base_url = "https://services1.arcgis.com/KbxwQRRfWyEYLgp4/arcgis/rest/services/BLM_Natl_Land_Use_Plans_Approved_2022/FeatureServer/1/query"
-    all_features = []
-    offset = 0
-    page_size = 1000
-
-    print("[INFO] Fetching approved land use plans…")
-
-    while True:
-        params = {
-            "where": "1=1",
-            "outFields": "*",
-            "returnGeometry": "true",
-            "outSR": "4326",
-            "f": "json",
-            "resultOffset": offset,
-            "resultRecordCount": page_size
-        }
-
-        resp = requests.get(base_url, params=params)
-        resp.raise_for_status()
-        data = resp.json()
-        arcgis_features = data.get("features", [])
+def get_count(client):
+    params = {"where": "1=1", "returnCountOnly": "true", "f": "json"}
+    return client.get_json(BASE_URL, params=params)["count"]
 
-        if not arcgis_features:
-            break
+def fetch_page(client, offset, page_size, max_offset=None, precision=None):
+    params = {
+        "where": "1=1",
+        "outFields": "*",
+        "returnGeometry": "true",
+        "outSR": "4326",
+        "f": "json",
+        "orderByFields": "OBJECTID",     # stable pages for concurrent offsets
+        "resultOffset": offset,
+        "resultRecordCount": page_size
+    }
+    if max_offset is not None:
+        params["maxAllowableOffset"] = max_offset
+    if precision is not None:
+        params["geometryPrecision"] = precision
 
-        for f in arcgis_features:
-            converted = arcgis_to_geojson_feature(f)
-            if converted:
-                all_features.append(converted)
+    arcgis_features = client.get_json(BASE_URL, params=params).get("features", [])
+    with metrics.span("convert", features=len(arcgis_features)):
+        converted = [arcgis_to_geojson_feature(f) for f in arcgis_features]
+    metrics.count("features", len(arcgis_features))
+    return [f for f in converted if f]
 
-        offset += page_size
-        print(f"[INFO] Retrieved {len(arcgis_features)} more features…")
+def iter_pages(client, page_size=PAGE_SIZE, workers=WORKERS, max_offset=None, precision=None):
+    """Yield the converted features of each offset page, in order, fetching ahead concurrently."""
+    count = get_count(client)
+    offsets = list(range(0, count, page_size))
+    print(f"[INFO] Fetching {count} approved land use plans in {len(offsets)} pages…")
 
-    return {
-        "type": "FeatureCollection",
-        "features": all_features
-    }
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        it = iter(offsets)
+        pending = [pool.submit(fetch_page, client, o, page_size, max_offset, precision)
+                   for _, o in zip(range(2 * workers), it)]
+        while pending:
+            features = pending.pop(0).result()
+            nxt = next(it, None)
+            if nxt is not None:
+                pending.append(pool.submit(fetch_page, client, nxt, page_size, max_offset, precision))
+            print(f"[INFO] Retrieved {len(features)} more features…")
+            yield features
 
 def main():
-    output_path = Path("data/outputs/approved_land_use_plans.geojson")
-    geojson = fetch_all_features()
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(output_path, "w") as f:
-        json.dump(geojson, f)
-    print(f"[DONE] Wrote {len(geojson['features'])} features to {output_path}")
+    ap = argparse.ArgumentParser(description="Fetch BLM approved land use plans as GeoJSON.")
+    ap.add_argument("-o", "--out", type=Path)
+    ap.add_argument("--ndjson", action="store_true", help="write newline-delimited GeoJSON")
+    ap.add_argument("--workers", type=int, default=WORKERS, help="concurrent page requests")
+    ap.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    ap.add_argument("--max-offset", type=float,
+                    help="maxAllowableOffset in degrees: server-side generalization")
+    ap.add_argument("--precision", type=int, help="geometryPrecision: decimals kept by the server")
+    ap.add_argument("--web", action="store_true",
+                    help=f"web-display preset (--max-offset {WEB_MAX_OFFSET} --precision {WEB_PRECISION})")
+    add_client_args(ap)
+    metrics.add_metrics_args(ap)
+    args = ap.parse_args()
+
+    with metrics.run("fetch_lup_approved", args):
+        if args.web:
+            args.max_offset = WEB_MAX_OFFSET if args.max_offset is None else args.max_offset
+            args.precision = WEB_PRECISION if args.precision is None else args.precision
+        out_path = output_path(args.out or (WEB_OUT_PATH if args.web else OUT_PATH), args.ndjson)
+
+        client = RestClient.from_args(args, pool_size=args.workers, timeout=TIMEOUT)
+        with FeatureCollectionWriter(out_path, ndjson=args.ndjson) as out:
+            # each page goes to disk in offset order as soon as it (and its predecessors) arrive
+            for features in iter_pages(client, args.page_size, args.workers,
+                                       args.max_offset, args.precision):
+                out.write_all(features)
+        print(f"[DONE] Wrote {out.count} features to {out_path}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,98 @@
+"""
+geojson_stream.py
+─────────────────
+Write GeoJSON features to disk as they arrive instead of building one big
+FeatureCollection in memory.
+
+    with FeatureCollectionWriter(path) as out:
+        for page in pages:
+            out.write_all(page)
+
+ndjson=True writes newline-delimited GeoJSON (one Feature per line, no
+wrapper).  The regular FeatureCollection output also keeps one feature per
+line, so read_features() can stream both forms back a line at a time.
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+import metrics
+
+NDJSON_SUFFIX = ".geojsonl"
+HEADER = '{"type":"FeatureCollection","features":[\n'
+
+
+class FeatureCollectionWriter:
+    def __init__(self, path, ndjson=False):
+        self.path = Path(path)
+        self.ndjson = ndjson
+        self.count = 0
+        self._tmp = self.path.with_name(self.path.name + ".part")
+        self._fh = None
+        self._seconds = 0.0           # time spent encoding + writing, reported as one span
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self._tmp, "w", encoding="utf-8")
+        if not self.ndjson:
+            self._fh.write(HEADER)
+        return self
+
+    def write(self, feature):
+        start = time.perf_counter()
+        line = json.dumps(feature, ensure_ascii=False, separators=(",", ":"))
+        if self.ndjson:
+            self._fh.write(line + "\n")
+        else:
+            self._fh.write((",\n" if self.count else "") + line)
+        self.count += 1
+        self._seconds += time.perf_counter() - start
+
+    def write_all(self, features):
+        for feature in features:
+            self.write(feature)
+        return self.count
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.ndjson:
+            self._fh.write("\n]}\n")
+        self._fh.close()
+        if exc_type is None:
+            # only replace the previous output once the new one is complete
+            os.replace(self._tmp, self.path)
+            metrics.record("write", self._seconds, path=str(self.path), features=self.count,
+                           bytes=self.path.stat().st_size)
+            metrics.count("features.written", self.count)
+        else:
+            self._tmp.unlink(missing_ok=True)
+        return False
+
+
+def output_path(path, ndjson):
+    """`path`, switched to the .geojsonl suffix for newline-delimited output"""
+    path = Path(path)
+    return path.with_suffix(NDJSON_SUFFIX) if ndjson else path
+
+
+def read_features(path):
+    """features of a GeoJSON / newline-delimited GeoJSON file, one at a time
+
+    Files in the layout FeatureCollectionWriter produces are streamed line by
+    line; any other FeatureCollection is parsed whole.
+    """
+    path = Path(path)
+    with open(path, encoding="utf-8") as fh:
+        if path.suffix == NDJSON_SUFFIX:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        if fh.readline() != HEADER:
+            fh.seek(0)
+            yield from json.load(fh)["features"]
+            return
+        for line in fh:
+            line = line.strip().rstrip(",")
+            if line and line != "]}":
+                yield json.loads(line)
@@ -8,53 +8,111 @@ National Forest administrative units that appear in the notice title.
 USAGE (from project root)
   python scripts/match_admin_units.py \
          data/raw/usfs_open_comments_2025-08-07.csv \
-         data/boundaries/Forest_Administrative_Boundaries_(Feature_Layer).geojson
+         data/boundaries/Forest_Administrative_Boundaries_(Feature_Layer).geojson \
+         [out.csv|out.parquet]
+
+Either input may also be Parquet/GeoParquet (only FORESTNAME is read from a
+columnar boundary file); by default the output sits next to the notice file,
+in the same format.  CSV in → CSV out is handled with the csv module alone,
+so the common cron case never imports pandas.
 """
-import sys, re, csv, json, pathlib, pandas as pd
+import argparse, csv, re, json, pathlib
+
+import metrics
+from phrase_automaton import PhraseAutomaton
 
 ################################################################################
 # 1.  read inputs --------------------------------------------------------------
 ################################################################################
-notice_csv  = pathlib.Path(sys.argv[1])
-boundary_fp = pathlib.Path(sys.argv[2])     # .geojson **or** .csv is fine
-
-df = pd.read_csv(notice_csv)
-
-# boundary file can be GeoJSON **or** the flat CSV ArcGIS export
-if boundary_fp.suffix.lower() == ".geojson":
-    with open(boundary_fp, "r", encoding="utf-8") as fh:
-        bdy_json = json.load(fh)
-    forest_names = [f["properties"]["FORESTNAME"] for f in bdy_json["features"]]
-else:                                       # flat CSV fallback
-    forest_names = pd.read_csv(boundary_fp)["FORESTNAME"].tolist()
+def load_forest_names(boundary_fp: pathlib.Path) -> list[str]:
+    # boundary file can be GeoJSON, (Geo)Parquet **or** the flat CSV ArcGIS export
+    if boundary_fp.suffix.lower() == ".geojson":
+        with metrics.span("read", path=str(boundary_fp)), open(boundary_fp, "r", encoding="utf-8") as fh:
+            bdy_json = json.load(fh)
+        return [f["properties"]["FORESTNAME"] for f in bdy_json["features"]]
+    if boundary_fp.suffix.lower() == ".csv":
+        with metrics.span("read", path=str(boundary_fp)), \
+                open(boundary_fp, newline="", encoding="utf-8-sig") as fh:
+            return [row["FORESTNAME"] for row in csv.DictReader(fh)]
+    from columnar import read_table
+    return read_table(boundary_fp, columns=["FORESTNAME"])["FORESTNAME"].tolist()
 
 ################################################################################
-# 2.  build simple lookup table ------------------------------------------------
+# 2.  compile the forest-name automaton ----------------------------------------
 ################################################################################
 # strip “National Forest(s)” so we catch titles that list several forests
 def simplify(name: str) -> str:
     return re.sub(r"\s+National\s+Forest[s]?", "", name, flags=re.I).strip().lower()
 
-canonical  = {name: simplify(name) for name in forest_names}
+def build_matcher(forest_names) -> PhraseAutomaton:
+    """one automaton over both the simplified and the full name of every forest"""
+    canonical = {name: simplify(name) for name in forest_names}
+    patterns = {}
+    for full, simp in canonical.items():
+        patterns[full.lower()] = full
+        if simp:
+            patterns[simp] = full
+    return PhraseAutomaton(patterns)
 
 ################################################################################
 # 3.  match each title to zero/one/many forests --------------------------------
 ################################################################################
-def match_title(title: str) -> list[str]:
-    low = title.lower()
-    hits = []
-    for full, simp in canonical.items():
-        if simp and simp in low:
-            hits.append(full)
-        elif full.lower() in low:
-            hits.append(full)
-    return sorted(set(hits))                # deduplicate & keep stable order
-
-df["admin_units"] = df["title"].apply(match_title)
+def match_title(title: str, matcher: PhraseAutomaton) -> list[str]:
+    return matcher.find(title)              # deduplicated & sorted
 
 ################################################################################
 # 4.  write output -------------------------------------------------------------
 ################################################################################
-out_csv = notice_csv.with_name(notice_csv.stem + "_with_units.csv")
-df.to_csv(out_csv, index=False)
-print(f"✓ wrote {out_csv} with admin_units column")
+def match_csv(notice_csv, out_csv, matcher):
+    """plain-CSV path: rows pass through as text, admin_units written as pandas would"""
+    with metrics.span("read", path=str(notice_csv)), \
+            open(notice_csv, newline="", encoding="utf-8-sig") as fh:
+        reader = csv.DictReader(fh)
+        rows = list(reader)
+        # header-less (empty) input → just the column; a rerun on our own output overwrites it
+        fields = [f for f in reader.fieldnames or [] if f != "admin_units"] + ["admin_units"]
+    with metrics.span("match", rows=len(rows)):
+        for row in rows:
+            row["admin_units"] = matcher.find(row.get("title") or "")
+    metrics.count("titles.matched", sum(1 for row in rows if row["admin_units"]))
+    with metrics.span("write", path=str(out_csv), rows=len(rows)), \
+            open(out_csv, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def match_table(notice_path, out_path, matcher):
+    from columnar import read_table, write_table
+
+    df = read_table(notice_path)
+    with metrics.span("match", rows=len(df)):
+        df["admin_units"] = matcher.find_series(df["title"])
+    metrics.count("titles.matched", int(df["admin_units"].map(bool).sum()))
+    write_table(df, out_path)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Add the forests named in each notice title.")
+    ap.add_argument("notices", type=pathlib.Path)
+    ap.add_argument("boundaries", type=pathlib.Path, help=".geojson, .csv or (Geo)Parquet")
+    ap.add_argument("out", type=pathlib.Path, nargs="?",
+                    help="default: <notices>_with_units, same format")
+    metrics.add_metrics_args(ap)
+    args = ap.parse_args(argv)
+
+    with metrics.run("match_admin_units", args):
+        forest_names = load_forest_names(args.boundaries)
+        with metrics.span("index", forests=len(forest_names)):
+            matcher = build_matcher(forest_names)
+
+        out = args.out or args.notices.with_name(
+            args.notices.stem + "_with_units" + args.notices.suffix)
+        if args.notices.suffix.lower() == out.suffix.lower() == ".csv":
+            match_csv(args.notices, out, matcher)
+        else:
+            match_table(args.notices, out, matcher)
+        print(f"✓ wrote {out} with admin_units column")
+
+if __name__ == "__main__":
+    main()
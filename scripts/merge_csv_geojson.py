@@ -1,43 +1,70 @@
-import json
-import pandas as pd
+import argparse
+from collections import defaultdict
 
-# --- Load the files ---
-geojson_path = "data/outputs/usfs_selected_forests.geojson"
-csv_path = "data/processed/usfs_comments_with_coords.csv"
-output_path = "data/processed/usfs_merged.geojson"
+import metrics
+from columnar import iter_features, read_table
+from geojson_stream import FeatureCollectionWriter
 
-with open(geojson_path, 'r', encoding='utf-8') as f:
-    geojson_data = json.load(f)
+# --- Default files (inputs: columnar intermediates or GeoJSON/CSV) ---
+geojson_path = "data/processed/usfs_selected_forests.parquet"
+csv_path = "data/processed/usfs_comments_with_coords.parquet"
+output_path = "data/processed/usfs_merged.geojson"
 
-df_csv = pd.read_csv(csv_path)
+NOTICE_FIELDS = ['title', 'type', 'comments_close_on', 'days_left', 'html_url']
 
 # --- Normalize and prepare multi-forest matching ---
 def get_forest_list(admin_units):
-    if pd.isna(admin_units):
+    if not isinstance(admin_units, str):
         return []
     return [name.strip().lower() for name in admin_units.split(';')]
 
-df_csv['forest_list'] = df_csv['admin unit'].apply(get_forest_list)
+@metrics.timed("index")
+def build_forest_index(df_csv):
+    """forest name → notice rows naming it, in CSV order (built once, O(rows))"""
+    # NaN / NA → None so the output stays valid JSON
+    records = df_csv.astype(object).where(df_csv.notna(), None).to_dict('records')
+    index = defaultdict(list)
+    for row in records:
+        notice = {k: row.get(k, '') for k in NOTICE_FIELDS}
+        for name in dict.fromkeys(get_forest_list(row.get('admin unit'))):
+            index[name].append(notice)
+    return index
 
 # --- Assign matching data ---
-for feature in geojson_data['features']:
-    forest_name = feature['properties'].get('FORESTNAME', '').strip().lower()
-
-    matched_row = None
-    for _, row in df_csv.iterrows():
-        if forest_name in row['forest_list']:
-            matched_row = row
-            break
-
-    if matched_row is not None:
-        feature['properties']['title'] = matched_row.get('title', '')
-        feature['properties']['type'] = matched_row.get('type', '')
-        feature['properties']['comments_close_on'] = matched_row.get('comments_close_on', '')
-        feature['properties']['days_left'] = matched_row.get('days_left', '')
-        feature['properties']['html_url'] = matched_row.get('html_url', '')
-
-# --- Save the new GeoJSON ---
-with open(output_path, 'w', encoding='utf-8') as f:
-    json.dump(geojson_data, f, indent=2)
-
-print(f"✅ Merged GeoJSON written to: {output_path}")
+def merge_features(features, index, all_matches=False):
+    for feature in features:
+        forest_name = (feature['properties'].get('FORESTNAME') or '').strip().lower()
+        matches = index.get(forest_name)
+        metrics.count("features.matched" if matches else "features.unmatched")
+        for k in NOTICE_FIELDS + ['notices']:
+            # a polygon layer that went through an earlier merge must not keep its old notice
+            feature['properties'].pop(k, None)
+        if matches:
+            # top-level fields stay the first matching notice, as the web map expects
+            feature['properties'].update(matches[0])
+            if all_matches:
+                feature['properties']['notices'] = matches
+        yield feature
+
+def main():
+    ap = argparse.ArgumentParser(description="Attach open USFS notices to forest polygons.")
+    ap.add_argument("--geojson", default=geojson_path, help="forest polygons (.parquet or .geojson)")
+    ap.add_argument("--csv", default=csv_path, help="notices with admin units (.parquet or .csv)")
+    ap.add_argument("-o", "--out", default=output_path)
+    ap.add_argument("--all-matches", action="store_true",
+                    help="also attach every matching notice as a 'notices' list")
+    metrics.add_metrics_args(ap)
+    args = ap.parse_args()
+
+    with metrics.run("merge_csv_geojson", args):
+        index = build_forest_index(read_table(args.csv, columns=['admin unit'] + NOTICE_FIELDS,
+                                              schema="fr_notices"))
+
+        # --- Save the new GeoJSON (compact, streamed) ---
+        with FeatureCollectionWriter(args.out) as out:
+            out.write_all(merge_features(iter_features(args.geojson), index, args.all_matches))
+
+        print(f"✅ Merged GeoJSON written to: {args.out} ({out.count} features)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+metrics.py
+──────────
+Lightweight instrumentation shared by the scripts: timing spans around the
+hot paths (HTTP requests, page loads, parsing, joins, writes), counters
+(bytes, features, retries, cache hits) and optional cProfile / tracemalloc
+capture, appended as JSON lines to one file that this script summarizes.
+
+    with metrics.run("fetch_fr", args):             # after add_metrics_args(ap)
+        with metrics.span("http", host=host) as s:
+            ...
+            s["status"] = 200                       # attributes can be added inside
+        metrics.count("http.bytes", len(body))
+
+Nothing is recorded unless --metrics / --profile / --trace-memory (or the
+ONX_METRICS / ONX_PROFILE / ONX_TRACE_MEMORY environment variables) are set.
+pipeline.py hands its settings to every stage through the environment, so
+one refresh lands in one file under one run id.
+
+Records, one JSON object per line:
+  {"type": "span", "run": …, "script": …, "name": "http", "ms": 12.4, …attributes}
+  {"type": "run", "run": …, "script": …, "seconds": …, "status": "ok",
+   "counters": {…}, "spans": {name: {"n", "ms", "max_ms"}}, "peak_mb": …, "profile": …}
+
+USAGE (from project root)
+  python scripts/metrics.py [data/logs/metrics.jsonl] [--run RUN_ID | --all]
+  python -m pstats data/logs/<script>-<run>.prof           # a --profile capture
+"""
+import argparse, contextlib, functools, json, os, pathlib, threading, time
+from collections import Counter, defaultdict
+
+METRICS_FILE = pathlib.Path("data/logs/metrics.jsonl")
+ENV_FILE = "ONX_METRICS"
+ENV_RUN = "ONX_METRICS_RUN"
+ENV_PROFILE = "ONX_PROFILE"
+ENV_MEMORY = "ONX_TRACE_MEMORY"
+
+
+class Recorder:
+    """one script's spans and counters; span lines are appended as they close"""
+
+    def __init__(self, path, run_id, script, profile=False, memory=False):
+        self.path = pathlib.Path(path)
+        self.run_id = run_id
+        self.script = script
+        self.profile = profile
+        self.memory = memory
+        self.counters = Counter()
+        self.spans = {}                   # name → [count, total s, max s]
+        self.lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # parallel pipeline stages share the file: one unbuffered O_APPEND write per
+        # line keeps every line whole instead of a buffer flush splitting it
+        self.fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def emit(self, record):
+        line = json.dumps({"type": record.pop("type"), "run": self.run_id, "script": self.script,
+                           **record}, default=str, separators=(",", ":"))
+        os.write(self.fd, (line + "\n").encode("utf-8"))
+
+    def add_span(self, name, seconds, attrs):
+        with self.lock:
+            agg = self.spans.setdefault(name, [0, 0.0, 0.0])
+            agg[0] += 1
+            agg[1] += seconds
+            agg[2] = max(agg[2], seconds)
+        self.emit({"type": "span", "name": name, "ms": round(seconds * 1e3, 3), **attrs})
+
+    def count(self, name, n):
+        with self.lock:
+            self.counters[name] += n
+
+    def close(self, **summary):
+        spans = {name: {"n": n, "ms": round(total * 1e3, 2), "max_ms": round(peak * 1e3, 2)}
+                 for name, (n, total, peak) in self.spans.items()}
+        self.emit({"type": "run", **summary, "counters": dict(self.counters), "spans": spans})
+        os.close(self.fd)
+
+
+_recorder = None
+
+
+def enabled():
+    return _recorder is not None
+
+
+@contextlib.contextmanager
+def span(name, **attrs):
+    """time the block as `name`; yields the attribute dict so the block can add to it"""
+    if _recorder is None:
+        yield attrs
+        return
+    start = time.perf_counter()
+    try:
+        yield attrs
+    except BaseException as e:
+        attrs["error"] = type(e).__name__
+        raise
+    finally:
+        _recorder.add_span(name, time.perf_counter() - start, attrs)
+
+
+def timed(name):
+    """decorator form of span()"""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def record(name, seconds, **attrs):
+    """a span measured by the caller (e.g. time summed over many small writes)"""
+    if _recorder is not None:
+        _recorder.add_span(name, seconds, attrs)
+
+
+def count(name, n=1):
+    if _recorder is not None:
+        _recorder.count(name, n)
+
+
+def add_metrics_args(ap):
+    """the --metrics / --profile / --trace-memory flags every script takes"""
+    g = ap.add_argument_group("metrics")
+    g.add_argument("--metrics", type=pathlib.Path, nargs="?", const=METRICS_FILE,
+                   default=os.environ.get(ENV_FILE) or None,
+                   help=f"append timing spans and counters to this JSON-lines file ({METRICS_FILE})")
+    g.add_argument("--profile", action="store_true", default=os.environ.get(ENV_PROFILE) == "1",
+                   help="cProfile the run (main thread); stats saved next to the metrics file")
+    g.add_argument("--trace-memory", action="store_true", default=os.environ.get(ENV_MEMORY) == "1",
+                   help="record the peak Python heap with tracemalloc (slows the run)")
+    return ap
+
+
+def settings(args=None):
+    """(metrics path or None, profile, trace memory) from parsed args, else the environment"""
+    if args is not None and hasattr(args, "metrics"):
+        path, profile, memory = args.metrics, args.profile, args.trace_memory
+    else:
+        path = os.environ.get(ENV_FILE) or None
+        profile, memory = os.environ.get(ENV_PROFILE) == "1", os.environ.get(ENV_MEMORY) == "1"
+    if path is None and (profile or memory):
+        path = METRICS_FILE
+    return (pathlib.Path(path) if path else None), profile, memory
+
+
+def child_env():
+    """os.environ plus the active run's metrics settings, for subprocesses"""
+    env = dict(os.environ)
+    if _recorder is not None:
+        env.update({ENV_FILE: str(_recorder.path.resolve()), ENV_RUN: _recorder.run_id,
+                    ENV_PROFILE: "1" if _recorder.profile else "0",
+                    ENV_MEMORY: "1" if _recorder.memory else "0"})
+    return env
+
+
+def new_run_id():
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+
+
+@contextlib.contextmanager
+def run(script, args=None):
+    """record the enclosed run of `script` (no-op unless metrics are switched on)"""
+    global _recorder
+    path, profile, memory = settings(args)
+    if path is None:
+        yield None
+        return
+
+    _recorder = rec = Recorder(path, os.environ.get(ENV_RUN) or new_run_id(), script, profile, memory)
+    profiler = None
+    if profile:
+        import cProfile
+        profiler = cProfile.Profile()
+    if memory:
+        import tracemalloc
+        tracemalloc.start()
+    status, start = "ok", time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        yield rec
+    except BaseException as e:
+        status = f"exit {e.code}" if isinstance(e, SystemExit) else type(e).__name__
+        raise
+    finally:
+        summary = {"seconds": round(time.perf_counter() - start, 3), "status": status}
+        if profiler:
+            profiler.disable()
+            prof = rec.path.with_name(f"{script}-{rec.run_id}.prof")
+            profiler.dump_stats(prof)
+            summary["profile"] = str(prof)
+        if memory:
+            summary["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+            tracemalloc.stop()
+        _recorder = None
+        rec.close(**summary)
+
+
+# ──── summary ────────────────────────────────────────────────────────
+def load(path, run_id=None, all_runs=False):
+    """(run records, span ms lists per (script, name)) of the selected run(s)"""
+    runs, spans, latest, records = [], defaultdict(list), None, []
+    with open(path, encoding="utf-8", errors="replace") as fh:
+        for n, line in enumerate(fh, 1):
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                print(f"[WARN] {path}:{n}: unreadable line skipped")
+    for r in records:
+        if r.get("type") == "run":
+            latest = r["run"]
+    wanted = None if all_runs else (run_id or latest)
+    for r in records:
+        if wanted and r.get("run") != wanted:
+            continue
+        if r.get("type") == "run":
+            runs.append(r)
+        elif r.get("type") == "span":
+            spans[(r["script"], r["name"])].append(r["ms"])
+    return wanted, runs, spans
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Summarize a metrics JSON-lines file.")
+    ap.add_argument("path", nargs="?", type=pathlib.Path, default=METRICS_FILE)
+    ap.add_argument("--run", help="run id (default: the latest run in the file)")
+    ap.add_argument("--all", action="store_true", help="every run in the file")
+    args = ap.parse_args()
+
+    if not args.path.exists():
+        raise SystemExit(f"no metrics at {args.path}; run a script with --metrics first")
+    wanted, runs, spans = load(args.path, args.run, args.all)
+    print(f"[INFO] {args.path}: run {wanted or 'all'}, {len(runs)} script run(s)")
+
+    for r in sorted(runs, key=lambda r: -r["seconds"]):
+        extra = "".join(f", {k} {r[k]}" for k in ("peak_mb", "profile") if k in r)
+        print(f"\n{r['script']}  {r['seconds']:.2f}s  {r['status']}{extra}")
+        rows = [(name, s) for name, s in r["spans"].items()]
+        if rows:
+            print(f"  {'span':<16} {'n':>7} {'total s':>9} {'share':>6} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9}")
+        for name, s in sorted(rows, key=lambda x: -x[1]["ms"]):
+            times = spans.get((r["script"], name), [])
+            share = s["ms"] / 1e3 / r["seconds"] if r["seconds"] else 0
+            print(f"  {name:<16} {s['n']:>7} {s['ms'] / 1e3:>9.2f} {share:>6.0%} "
+                  f"{s['ms'] / s['n']:>9.2f} {percentile(times, 0.95):>9.2f} {s['max_ms']:>9.2f}")
+        if r["counters"]:
+            print("  " + ", ".join(f"{k} {v:,}" for k, v in sorted(r["counters"].items())))
+
+    totals = defaultdict(float)
+    for r in runs:
+        for name, s in r["spans"].items():
+            totals[name] += s["ms"] / 1e3
+    if totals:
+        print("\n[DONE] time by span (summed over scripts; nested and parallel spans overlap): "
+              + ", ".join(f"{k} {v:.1f}s" for k, v in sorted(totals.items(), key=lambda x: -x[1])))
+
+if __name__ == "__main__":
+    main()
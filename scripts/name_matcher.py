@@ -0,0 +1,117 @@
+"""
+name_matcher.py
+───────────────
+Approximate matching of free-text office / forest names against a fixed set
+of canonical names (BLM ADMU_NAME, USFS FORESTNAME, …).
+
+Names are normalized, abbreviations expanded, and every candidate is posted
+in two inverted indexes – one by word token and one by character trigram –
+so a query is only scored against candidates that share a token or trigram
+with it, never against the whole list.
+
+    matcher = NameMatcher(lookup, normalize=norm, aliases={"MTN": "MOUNTAIN"})
+    m = matcher.match("Mtn Home FO")
+    m.key, m.value, m.score, m.method        # method: exact | token | ngram
+"""
+import re
+from collections import Counter, defaultdict
+from typing import NamedTuple
+
+MIN_SCORE = 0.75
+
+
+class Match(NamedTuple):
+    key: str          # normalized candidate key that matched
+    value: object     # payload stored for that key
+    score: float      # 0…1 confidence
+    method: str       # "exact", "token" or "ngram"
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameMatcher:
+    def __init__(self, choices: dict, normalize=None, aliases=None, min_score=MIN_SCORE):
+        """
+        choices   {name: payload}; names are normalized with `normalize`
+        aliases   {abbreviation: expansion} applied token-wise after normalizing
+        """
+        self.normalize = normalize or (lambda s: re.sub(r"\s+", " ", s.upper()).strip())
+        self.aliases = {k.upper(): v.upper() for k, v in (aliases or {}).items()}
+        self.min_score = min_score
+
+        self.keys, self.values = [], []
+        self.exact = {}
+        self.tokens = []                       # token set per candidate
+        self.grams = []                        # trigram set per candidate
+        self.by_token = defaultdict(list)      # token   → candidate ids
+        self.by_gram = defaultdict(list)       # trigram → candidate ids
+        for name, value in choices.items():
+            key = self._prepare(name)
+            if not key or key in self.exact:
+                continue
+            i = len(self.keys)
+            self.keys.append(key)
+            self.values.append(value)
+            self.exact[key] = i
+            toks, grams = set(key.split()), trigrams(key)
+            self.tokens.append(toks)
+            self.grams.append(grams)
+            for t in toks:
+                self.by_token[t].append(i)
+            for g in grams:
+                self.by_gram[g].append(i)
+        self._memo = {}
+
+    def _prepare(self, text) -> str:
+        t = self.normalize(str(text))
+        return " ".join(self.aliases.get(tok, tok) for tok in t.split())
+
+    def match(self, text) -> Match | None:
+        """best candidate scoring at least min_score, or None"""
+        if text is None:
+            return None
+        key = self._prepare(text)
+        if key in self._memo:
+            return self._memo[key]
+        self._memo[key] = result = self._match(key)
+        return result
+
+    def _match(self, key: str) -> Match | None:
+        if not key:
+            return None
+        i = self.exact.get(key)
+        if i is not None:
+            return Match(self.keys[i], self.values[i], 1.0, "exact")
+
+        q_tokens = set(key.split())
+        best = None
+        # token pass: Jaccard over candidates sharing at least one word
+        cands = {i for t in q_tokens for i in self.by_token.get(t, ())}
+        for i in cands:
+            c = self.tokens[i]
+            score = len(q_tokens & c) / len(q_tokens | c)
+            if best is None or score > best[0]:
+                best = (score, i, "token")
+
+        # trigram pass catches typos and abbreviations the aliases miss;
+        # candidates must share a reasonable fraction of the query's trigrams
+        q_grams = trigrams(key)
+        shared = Counter(i for g in q_grams for i in self.by_gram.get(g, ()))
+        need = max(1, int(len(q_grams) * self.min_score / 2))
+        for i, n in shared.items():
+            if n < need:
+                continue
+            score = 2 * n / (len(q_grams) + len(self.grams[i]))     # Dice coefficient
+            if best is None or score > best[0]:
+                best = (score, i, "ngram")
+
+        if best is None or best[0] < self.min_score:
+            return None
+        score, i, method = best
+        return Match(self.keys[i], self.values[i], round(score, 3), method)
+
+    def match_many(self, texts) -> list[Match | None]:
+        return [self.match(t) for t in texts]
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+onx.py
+──────
+One command for every script:  onx <command> [args…]  is the same as
+python scripts/<script>.py [args…].  Nothing but the standard library is
+imported until a command is picked, so --help / --version answer at bare
+interpreter speed, and each script pulls in pandas / geopandas / playwright
+only on the code paths that need them.
+
+  onx imports [command …]    import-time breakdown (python -X importtime) of
+                             the commands' modules, heaviest direct imports first
+
+USAGE (from project root)
+  python scripts/onx.py --help | --version
+  python scripts/onx.py pipeline --dry-run
+  python scripts/onx.py match-units data/raw/usfs_open_comments.csv data/boundaries/….geojson
+  python scripts/onx.py imports
+"""
+import argparse, importlib, pathlib, sys
+
+VERSION = "0.1.0"
+SCRIPTS = pathlib.Path(__file__).resolve().parent
+
+# command → (module in scripts/, one-line help); kept static so --help imports nothing
+COMMANDS = {
+    "fetch-fr":          ("fetch_fr", "open Forest Service comment notices from the Federal Register"),
+    "fetch-fs-units":    ("fetch_fs_planning_units", "Forest Service planning-unit polygons"),
+    "fetch-lup":         ("fetch_lup_approved", "BLM approved land use plan polygons"),
+    "blm-download":      ("blm_download", "BLM ePlanning project grid as CSV"),
+    "blm-scrape-coords": ("blm_active_projects", "project coordinates from ePlanning pages (playwright)"),
+    "blm-coords":        ("blm_coords_join", "BLM projects + admin-unit centroids"),
+    "blm-assign-plans":  ("assign_blm_plans", "land use plan(s) containing each BLM project"),
+    "match-units":       ("match_admin_units", "forests named in each notice title"),
+    "usfs-coords":       ("usfs_join_geom", "FR notices + forest centroids"),
+    "usfs-merge":        ("merge_csv_geojson", "forest polygons + the notices that name them"),
+    "columnar":          ("columnar", "convert CSV / GeoJSON ⇄ Parquet / GeoParquet"),
+    "web-layers":        ("build_web_layers", "simplified GeoJSON layers for the web map"),
+    "tiles":             ("build_tiles", "vector tile pyramid"),
+    "tile-server":       ("tile_server", "serve the tile pyramid"),
+    "query-server":      ("query_server", "spatial / attribute query API"),
+    "diff":              ("snapshot_diff", "changeset against the last snapshot"),
+    "pipeline":          ("pipeline", "the whole refresh, incrementally"),
+    "metrics":           ("metrics", "summarize a metrics JSON-lines file"),
+}
+
+
+def dispatch(command, argv):
+    """run scripts/<module>.py's main() as if invoked directly"""
+    module = COMMANDS[command][0]
+    if str(SCRIPTS) not in sys.path:
+        sys.path.insert(0, str(SCRIPTS))
+    sys.argv = [f"onx {command}", *argv]
+    return importlib.import_module(module).main()
+
+
+# ──── onx imports ────────────────────────────────────────────────────
+def import_times(module):
+    """(total ms, {direct import: cumulative ms}) of `module`, from python -X importtime"""
+    import os, subprocess
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(
+        p for p in (str(SCRIPTS), os.environ.get("PYTHONPATH")) if p)}
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env=env)
+    if proc.returncode:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    rows = []                              # (depth, name, cumulative ms); children precede parents
+    for line in proc.stderr.splitlines():
+        parts = line[len("import time:"):].split("|") if line.startswith("import time:") else []
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            name = parts[2][1:]
+            rows.append(((len(name) - len(name.lstrip())) // 2, name.strip(), int(parts[1]) / 1e3))
+    end = max(i for i, (depth, name, _) in enumerate(rows) if depth == 0 and name == module)
+    children = {}
+    for depth, name, ms in reversed(rows[:end]):
+        if depth == 0:
+            break                          # start of the previous top-level import
+        if depth == 1:
+            children[name] = ms
+    return rows[end][2], children
+
+
+def startup_ms(cmd, runs=5):
+    import subprocess, time
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, capture_output=True)
+        best = min(best, (time.perf_counter() - start) * 1e3)
+    return best
+
+
+def report_imports(commands):
+    unknown = [c for c in commands if c not in COMMANDS]
+    if unknown:
+        raise SystemExit(f"unknown command(s): {', '.join(unknown)}")
+    print(f"{'command':<18} {'module':<24} {'import ms':>9}  heaviest imports")
+    for command in commands or COMMANDS:
+        module = COMMANDS[command][0]
+        try:
+            total, children = import_times(module)
+        except RuntimeError as e:
+            print(f"{command:<18} {module:<24} {'–':>9}  [WARN] {e}")
+            continue
+        heavy = sorted(((ms, p) for p, ms in children.items()), reverse=True)[:3]
+        print(f"{command:<18} {module:<24} {total:>9.1f}  "
+              + ", ".join(f"{p} {ms:.0f}" for ms, p in heavy if ms >= 1))
+    bare = startup_ms([sys.executable, "-c", "pass"])
+    onx = startup_ms([sys.executable, str(SCRIPTS / "onx.py"), "--version"])
+    print(f"[DONE] onx --version {onx:.0f} ms wall (bare interpreter {bare:.0f} ms)")
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        prog="onx", description="Run any of the pipeline scripts: onx <command> [args…]",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="commands:\n" + "\n".join(f"  {c:<18} {h}" for c, (_, h) in COMMANDS.items())
+               + f"\n  {'imports':<18} import-time breakdown of the commands' modules"
+               + "\n\n`onx <command> --help` shows a command's own options.")
+    ap.add_argument("--version", action="version", version=f"onx {VERSION}")
+    ap.add_argument("command", choices=[*COMMANDS, "imports"], metavar="command")
+    ap.add_argument("args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.command == "imports":
+        report_imports(args.args)
+    else:
+        dispatch(args.command, args.args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+phrase_automaton.py
+───────────────────
+Aho-Corasick automaton over *words* for finding many names in text at once.
+
+Patterns and text are split into lower-case word tokens, so every hit is
+word-boundary aligned ("Dixie" does not fire inside "Dixieland") and
+punctuation differences such as "Wallowa-Whitman" / "Wallowa Whitman" don't
+matter.  The automaton is compiled once; each text is then scanned in a
+single left-to-right pass regardless of how many patterns there are.
+
+    ac = PhraseAutomaton({"dixie": "Dixie National Forest", ...})
+    ac.find("Dixie National Forest; Utah; ...")    # → ["Dixie National Forest"]
+    ac.find_series(df["title"])                    # → Series of lists
+"""
+import re
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN.findall(text.lower())
+
+
+class PhraseAutomaton:
+    def __init__(self, patterns: dict):
+        """patterns: {phrase: label}; several phrases may share one label"""
+        self.goto = [{}]          # state → {token: next state}
+        self.fail = [0]
+        self.out = [set()]        # labels emitted on reaching a state
+        for phrase, label in patterns.items():
+            toks = tokenize(phrase)
+            if not toks:
+                continue
+            state = 0
+            for t in toks:
+                nxt = self.goto[state].get(t)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][t] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(set())
+                state = nxt
+            self.out[state].add(label)
+        self._link()
+
+    def _link(self):
+        """breadth-first failure links; outputs inherit their fallback's outputs"""
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for tok, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and tok not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(tok, 0)
+                self.out[nxt] |= self.out[self.fail[nxt]]
+
+    def find(self, text) -> list[str]:
+        """sorted, de-duplicated labels of every phrase occurring in `text`"""
+        if not isinstance(text, str):
+            return []
+        goto, fail, out = self.goto, self.fail, self.out
+        state, hits = 0, set()
+        for tok in tokenize(text):
+            while state and tok not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(tok, 0)
+            if out[state]:
+                hits |= out[state]
+        return sorted(hits)
+
+    def find_all(self, texts) -> list[list[str]]:
+        return [self.find(t) for t in texts]
+
+    def find_series(self, series):
+        """batch API over a pandas column; NaN / non-text cells give []"""
+        import pandas as pd
+        return pd.Series(self.find_all(series), index=series.index, name=series.name)
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+pipeline.py
+───────────
+One entry point for the whole refresh.  Every script is a stage with explicit
+inputs and outputs; a stage depends on whichever stages produce its inputs.
+
+* incremental: a stage is skipped when the hash of its command, its code
+  (the script plus the sibling modules it imports) and its input files is the
+  one recorded after its last successful run, and its outputs still exist
+* fetch stages (network sources) always run, unless --no-fetch; when the
+  fetched file comes back byte-identical everything downstream is skipped
+* independent branches (BLM, USFS/FR, boundary fetches) run in parallel
+* a per-stage timing report goes to data/pipeline_report.json
+* hand-supplied files no stage can produce (SOURCES) are checked up front;
+  a stage whose source is missing fails with a hint instead of never running
+
+USAGE (from project root)
+  python scripts/pipeline.py                    # everything that is out of date
+  python scripts/pipeline.py usfs-merge         # one target + what it needs
+  python scripts/pipeline.py --list | --dry-run | --force | --no-fetch | -j 4
+"""
+import argparse, hashlib, json, pathlib, re, subprocess, sys, time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+import metrics
+
+SCRIPTS = pathlib.Path(__file__).resolve().parent
+STATE_FILE = pathlib.Path("data/.pipeline_state.json")
+REPORT_FILE = pathlib.Path("data/pipeline_report.json")
+LOG_DIR = pathlib.Path("data/logs")
+JOBS = 4
+
+BOUNDARIES = "data/boundaries/Forest_Administrative_Boundaries_(Feature_Layer).geojson"
+ADMU_INDEX = "data/processed/blm_admu_centroids.json"
+FORESTS = "data/outputs/usfs_selected_forests.geojson"
+FOREST_CENTROIDS = "data/processed/usfs_selected_forests.csv"
+
+# files that have to exist before the pipeline can use them → how to get them
+SOURCES = {
+    BOUNDARIES: "export the USFS Forest Administrative Boundaries feature layer as GeoJSON",
+    ADMU_INDEX: "run blm_coords_join.py once with --zip <BLM admin unit .gdb.zip> to build it",
+    FORESTS: "the selected forest polygons, exported from the boundary layer",
+    FOREST_CENTROIDS: "FORESTNAME, lon, lat of the selected forests",
+}
+
+
+@dataclass
+class Stage:
+    name: str
+    script: str
+    args: list = field(default_factory=list)
+    inputs: list = field(default_factory=list)
+    sources: list = field(default_factory=list)     # hand-supplied inputs (keys of SOURCES)
+    outputs: list = field(default_factory=list)
+    fetch: bool = False          # reads the network: its inputs can't be hashed
+    default: bool = True         # part of a plain `pipeline.py` run
+
+
+STAGES = [
+    # BLM chain
+    Stage("blm-download", "blm_download.py", ["-o", "data/raw/blm_active_projects.csv"],
+          outputs=["data/raw/blm_active_projects.csv"], fetch=True),
+    Stage("blm-coords", "blm_coords_join.py",
+          ["-i", "data/raw/blm_active_projects.csv", "-o", "data/outputs/blm_projects_with_coords.csv"],
+          inputs=["data/raw/blm_active_projects.csv"], sources=[ADMU_INDEX],
+          outputs=["data/outputs/blm_projects_with_coords.csv"]),
+    Stage("blm-assign-plans", "assign_blm_plans.py",
+          ["--projects", "data/outputs/blm_projects_with_coords.csv",
+           "--plans", "data/outputs/approved_land_use_plans.geojson",
+           "-o", "data/outputs/blm_projects_with_plans.csv"],
+          inputs=["data/outputs/blm_projects_with_coords.csv", "data/outputs/approved_land_use_plans.geojson"],
+          outputs=["data/outputs/blm_projects_with_plans.csv"]),
+    Stage("blm-scrape-coords", "blm_active_projects.py", ["-o", "data/raw/blm_project_coords.csv"],
+          outputs=["data/raw/blm_project_coords.csv"], fetch=True, default=False),
+    # USFS / Federal Register chain
+    Stage("fr-fetch", "fetch_fr.py", ["-o", "data/raw/usfs_open_comments.csv"],
+          outputs=["data/raw/usfs_open_comments.csv"], fetch=True),
+    Stage("fr-units", "match_admin_units.py",
+          ["data/raw/usfs_open_comments.csv", BOUNDARIES, "data/processed/usfs_open_comments_with_units.parquet"],
+          inputs=["data/raw/usfs_open_comments.csv"], sources=[BOUNDARIES],
+          outputs=["data/processed/usfs_open_comments_with_units.parquet"]),
+    Stage("forests-columnar", "columnar.py",
+          [FORESTS, "data/processed/usfs_selected_forests.parquet"],
+          sources=[FORESTS],
+          outputs=["data/processed/usfs_selected_forests.parquet"]),
+    Stage("centroids-columnar", "columnar.py",
+          [FOREST_CENTROIDS, "data/processed/usfs_forest_centroids.parquet",
+           "--schema", "forest_centroids"],
+          sources=[FOREST_CENTROIDS],
+          outputs=["data/processed/usfs_forest_centroids.parquet"]),
+    Stage("usfs-coords", "usfs_join_geom.py",
+          ["--comments", "data/processed/usfs_open_comments_with_units.parquet",
+           "-o", "data/processed/usfs_comments_with_coords.parquet"],
+          inputs=["data/processed/usfs_open_comments_with_units.parquet",
+                  "data/processed/usfs_forest_centroids.parquet"],
+          outputs=["data/processed/usfs_comments_with_coords.parquet"]),
+    Stage("usfs-merge", "merge_csv_geojson.py",
+          inputs=["data/processed/usfs_selected_forests.parquet",
+                  "data/processed/usfs_comments_with_coords.parquet"],
+          outputs=["data/processed/usfs_merged.geojson"]),
+    # boundary fetches
+    Stage("fs-units", "fetch_fs_planning_units.py",
+          outputs=["data/outputs/fs_planning_units.geojson"], fetch=True),
+    Stage("blm-plans", "fetch_lup_approved.py",
+          outputs=["data/outputs/approved_land_use_plans.geojson"], fetch=True),
+    # web artifacts
+    Stage("web-layers", "build_web_layers.py",
+          inputs=["data/outputs/approved_land_use_plans.geojson", "data/outputs/fs_planning_units.geojson",
+                  "data/processed/usfs_merged.geojson"],
+          outputs=["data/web/manifest.json"]),
+    Stage("tiles", "build_tiles.py",
+          inputs=["data/outputs/approved_land_use_plans.geojson", "data/outputs/fs_planning_units.geojson",
+                  "data/processed/usfs_merged.geojson"],
+          outputs=["data/web/onx.mbtiles"]),
+    # deltas against the previous refresh
+    Stage("diff", "snapshot_diff.py",
+          inputs=["data/raw/blm_active_projects.csv", "data/raw/usfs_open_comments.csv",
+                  "data/processed/usfs_merged.geojson"],
+          outputs=["data/changes/latest.ndjson"]),
+]
+
+
+class Hasher:
+    """sha256 of files, memoized on (size, mtime) across runs"""
+
+    def __init__(self, memo):
+        self.memo = memo
+
+    def file(self, path):
+        path = pathlib.Path(path)
+        st = path.stat()
+        sig = [st.st_size, st.st_mtime_ns]
+        hit = self.memo.get(str(path))
+        if hit and hit[:2] == sig:
+            return hit[2]
+        h = hashlib.sha256()
+        with path.open("rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                h.update(block)
+        self.memo[str(path)] = sig + [h.hexdigest()]
+        return h.hexdigest()
+
+
+def code_files(script):
+    """the script plus every sibling module it imports, transitively"""
+    seen, todo = set(), [SCRIPTS / script]
+    while todo:
+        path = todo.pop()
+        if path in seen or not path.exists():
+            continue
+        seen.add(path)
+        for mod in re.findall(r"^\s*(?:from|import)\s+(\w+)", path.read_text(encoding="utf-8"), re.M):
+            todo.append(SCRIPTS / f"{mod}.py")
+    return sorted(seen)
+
+
+def stage_key(stage, hasher):
+    h = hashlib.sha256(json.dumps([stage.script, stage.args]).encode())
+    for path in code_files(stage.script):
+        h.update(path.name.encode() + hasher.file(path).encode())
+    for path in stage.sources + stage.inputs:
+        h.update(path.encode() + hasher.file(path).encode())
+    return h.hexdigest()
+
+
+def plan(stages, targets):
+    """the targets plus everything upstream of them, with each stage's dependencies"""
+    producer = {out: s.name for s in stages for out in s.outputs}
+    by_name = {s.name: s for s in stages}
+    deps = {s.name: {producer[i] for i in s.inputs if i in producer} for s in stages}
+    wanted, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(deps[name])
+    return [by_name[n] for n in by_name if n in wanted], {n: deps[n] & wanted for n in wanted}
+
+
+def run_stage(stage):
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    log = LOG_DIR / f"{stage.name}.log"
+    start = time.perf_counter()
+    with metrics.span("stage", stage=stage.name) as s, log.open("w", encoding="utf-8") as fh:
+        # stages inherit --metrics/--profile through the environment, under this run's id
+        proc = subprocess.run([sys.executable, str(SCRIPTS / stage.script), *stage.args],
+                              stdout=fh, stderr=subprocess.STDOUT, env=metrics.child_env())
+        s["exit"] = proc.returncode
+    return proc.returncode, time.perf_counter() - start, log
+
+
+def tail(path, n=15):
+    return "\n".join(path.read_text(encoding="utf-8", errors="replace").splitlines()[-n:])
+
+
+def run(stages, deps, state, hasher, jobs, force=False, no_fetch=False, dry_run=False):
+    keys, report = state.setdefault("keys", {}), {}
+    pending, running = {s.name: s for s in stages}, {}
+
+    def decide(stage):
+        """(run?, reason) – called once all its dependencies have finished"""
+        missing = [p for p in stage.sources if not pathlib.Path(p).exists()]
+        if missing:
+            return None, f"missing source {missing[0]}"
+        missing = [p for p in stage.inputs if not pathlib.Path(p).exists()]
+        if missing:
+            return None, f"missing input {missing[0]}"
+        have_outputs = all(pathlib.Path(p).exists() for p in stage.outputs)
+        if stage.fetch:
+            if no_fetch and have_outputs:
+                return False, "--no-fetch"
+            return True, "fetch"
+        if force:
+            return True, "--force"
+        if not have_outputs:
+            return True, "outputs missing"
+        if keys.get(stage.name) != stage_key(stage, hasher):
+            return True, "inputs or code changed"
+        return False, "up to date"
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                status = {report[d]["status"] for d in deps[name] if d in report}
+                if any(d not in report for d in deps[name]):
+                    continue                              # still waiting on upstream
+                del pending[name]
+                if status & {"failed", "blocked"}:
+                    report[name] = {"status": "blocked", "seconds": 0.0, "reason": "upstream failed"}
+                    continue
+                if "would run" in status:
+                    report[name] = {"status": "would run", "seconds": 0.0, "reason": "upstream changes"}
+                    continue
+                go, reason = decide(stage)
+                if go is None:
+                    report[name] = {"status": "failed", "seconds": 0.0, "reason": reason}
+                elif not go or dry_run:
+                    report[name] = {"status": "would run" if go else "skipped", "seconds": 0.0,
+                                    "reason": reason}
+                else:
+                    print(f"[INFO] {name}: running ({reason})")
+                    running[pool.submit(run_stage, stage)] = stage
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                stage = running.pop(fut)
+                code, seconds, log = fut.result()
+                if code == 0:
+                    if not stage.fetch:
+                        keys[stage.name] = stage_key(stage, hasher)
+                    report[stage.name] = {"status": "ran", "seconds": round(seconds, 2), "reason": ""}
+                    print(f"[INFO] {stage.name}: done in {seconds:.1f}s")
+                else:
+                    keys.pop(stage.name, None)
+                    report[stage.name] = {"status": "failed", "seconds": round(seconds, 2),
+                                          "reason": f"exit {code}, see {log}"}
+                    print(f"[ERROR] {stage.name} failed (exit {code}):\n{tail(log)}")
+    return report
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run the data pipeline, rebuilding only what changed.")
+    ap.add_argument("targets", nargs="*", help="stages to bring up to date (default: all)")
+    ap.add_argument("-j", "--jobs", type=int, default=JOBS, help="stages run in parallel")
+    ap.add_argument("--force", action="store_true", help="rerun every selected stage")
+    ap.add_argument("--no-fetch", action="store_true", help="reuse fetched files that already exist")
+    ap.add_argument("--dry-run", action="store_true", help="show what would run")
+    ap.add_argument("--list", action="store_true", help="list stages and their dependencies")
+    metrics.add_metrics_args(ap)
+    args = ap.parse_args()
+
+    names = [s.name for s in STAGES]
+    unknown = [t for t in args.targets if t not in names]
+    if unknown:
+        ap.error(f"unknown stage(s): {', '.join(unknown)} (choose from {', '.join(names)})")
+    stages, deps = plan(STAGES, args.targets or [s.name for s in STAGES if s.default])
+    if args.list:
+        for s in stages:
+            after = ", ".join(sorted(deps[s.name])) or "—"
+            needs = "".join(f"\n{'':<47}needs: {p}" + ("" if pathlib.Path(p).exists() else " (MISSING)")
+                            for p in s.sources)
+            print(f"{s.name:<18} {s.script:<28} after: {after}{needs}")
+        return
+
+    for path in sorted({p for s in stages for p in s.sources if not pathlib.Path(p).exists()}):
+        users = ", ".join(s.name for s in stages if path in s.sources)
+        print(f"[ERROR] missing source {path} (needed by {users}): {SOURCES.get(path, 'supply it by hand')}")
+
+    state = json.loads(STATE_FILE.read_text()) if STATE_FILE.exists() else {}
+    hasher = Hasher(state.setdefault("files", {}))
+    start = time.perf_counter()
+    with metrics.run("pipeline", args):
+        report = run(stages, deps, state, hasher, args.jobs, args.force, args.no_fetch, args.dry_run)
+        for r in report.values():
+            metrics.count(f"stages.{r['status'].replace(' ', '_')}")
+    wall = time.perf_counter() - start
+
+    if not args.dry_run:
+        STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        STATE_FILE.write_text(json.dumps(state, indent=1))
+        REPORT_FILE.write_text(json.dumps({
+            "finished": time.strftime("%Y-%m-%dT%H:%M:%S"), "wall_seconds": round(wall, 2),
+            "stages": report}, indent=2))
+
+    print(f"\n{'stage':<18} {'status':<10} {'seconds':>8}  reason")
+    for s in stages:
+        r = report[s.name]
+        print(f"{s.name:<18} {r['status']:<10} {r['seconds']:>8.1f}  {r['reason']}")
+    busy = sum(r["seconds"] for r in report.values())
+    print(f"[DONE] wall {wall:.1f}s, stage time {busy:.1f}s"
+          + ("" if args.dry_run else f" → {REPORT_FILE}"))
+    if any(r["status"] == "failed" for r in report.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
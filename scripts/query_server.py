@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+query_server.py
+───────────────
+Local bbox + attribute query service over the processed outputs, so the web
+map asks for what is in view instead of downloading whole layers up front.
+
+  GET /layers      layer names, feature counts, agency/program values
+  GET /features?layer=blm-projects&bbox=w,s,e,n&min_days=0&max_days=30
+               &agency=BLM&program=Vegetation,Lands%20and%20Realty&limit=500&offset=0
+                   → GeoJSON FeatureCollection + numberMatched / numberReturned / next
+
+Every layer is indexed once at startup:
+* geometry   shapely STRtree (packed R-tree) over the feature geometries
+* days_left  row ids sorted by days left, range-searched by bisection
+* agency, program   value → sorted row ids
+A query starts from its most selective filter – the tree's bbox hits, or the
+smallest attribute match set – and checks the other filters as vectorized
+column tests on just those candidates.
+Features are serialized once at load, so a response is a byte join.
+
+USAGE (from project root)
+  python scripts/query_server.py [--port 8090]
+requires: shapely>=2 (numpy)
+"""
+import argparse, csv, datetime as dt, json, math, pathlib, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import metrics
+
+PORT = 8090
+BLM_PROJECTS_CSV = pathlib.Path("data/outputs/blm_projects_with_coords.csv")
+BLM_PROJECTS_WITH_PLANS = pathlib.Path("data/outputs/blm_projects_with_plans.csv")   # assign_blm_plans.py
+USFS_MERGED_GEOJSON = pathlib.Path("data/processed/usfs_merged.geojson")
+PAGE_SIZE, MAX_PAGE_SIZE = 500, 5000
+SCAN_CUTOFF = 256                 # fewer attribute candidates than this → skip the tree
+
+
+def days_until(value, today):
+    """days from today to an ISO or MM/DD/YYYY date, None if unparseable"""
+    value = (value or "").strip()
+    for fmt in ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y"):
+        try:
+            return (dt.datetime.strptime(value, fmt).date() - today).days
+        except ValueError:
+            pass
+    return None
+
+
+def blm_project_records(path, today):
+    """CSV rows → point features, properties keyed the way web/index.html reads them"""
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        for row in csv.DictReader(fh):
+            props = {k.strip().lower(): (v or "").strip() for k, v in row.items() if k}
+            try:
+                lat, lon = float(props["latitude"]), float(props["longitude"])
+            except (KeyError, ValueError):
+                continue
+            days = days_until(props.get("days left"), today)
+            close = (today + dt.timedelta(days=days)).isoformat() if days is not None else ""
+            props.update(closure_date=close, days_left=days)
+            feature = {"type": "Feature", "properties": props,
+                       "geometry": {"type": "Point", "coordinates": [lon, lat]}}
+            yield feature, "BLM", props.get("program") or None, days
+
+
+def usfs_forest_records(path, today):
+    with open(path, encoding="utf-8") as fh:
+        features = json.load(fh)["features"]
+    for f in features:
+        if not f.get("geometry"):
+            continue
+        props = f["properties"]
+        days = days_until(props.get("comments_close_on"), today)
+        if days is None and isinstance(props.get("days_left"), (int, float)) \
+                and not math.isnan(props["days_left"]):
+            days = int(props["days_left"])
+        props["days_left"] = days
+        yield f, "USFS", props.get("type") or None, days
+
+
+# layer → (candidate paths in order of preference; reader) – see pick_source
+SOURCES = {
+    "blm-projects": ((BLM_PROJECTS_WITH_PLANS, BLM_PROJECTS_CSV), blm_project_records),
+    "usfs-forests": ((USFS_MERGED_GEOJSON,), usfs_forest_records),
+}
+
+
+class LayerIndex:
+    """STRtree + sorted attribute indexes over one layer's features"""
+
+    def __init__(self, records):
+        import numpy as np
+        import shapely
+        from shapely.geometry import shape
+
+        features, agencies, programs, days = zip(*records) if records else ((), (), (), ())
+        self.encoded = [json.dumps(f, separators=(",", ":")).encode() for f in features]
+        self.geoms = np.array([shape(f["geometry"]) for f in features], dtype=object)
+        self.tree = shapely.STRtree(self.geoms)
+
+        self.days = np.array([math.nan if d is None else d for d in days], dtype=float)
+        known = np.flatnonzero(~np.isnan(self.days))
+        self.days_ids = known[np.argsort(self.days[known], kind="stable")]
+        self.days_sorted = self.days[self.days_ids]
+
+        self.codes, self.postings = {}, {}
+        for field, values in (("agency", agencies), ("program", programs)):
+            self.codes[field], self.postings[field] = self._postings(values)
+
+    @staticmethod
+    def _postings(values):
+        """per-row value codes (-1 = none) and casefolded value → (label, code, sorted ids)"""
+        import numpy as np
+
+        codes = np.full(len(values), -1, dtype=np.int32)
+        groups = {}
+        for i, v in enumerate(values):
+            if v:
+                label, code, ids = groups.setdefault(v.casefold(), (v, len(groups), []))
+                codes[i] = code
+                ids.append(i)
+        return codes, {k: (label, code, np.array(ids, dtype=np.int64))
+                       for k, (label, code, ids) in groups.items()}
+
+    def __len__(self):
+        return len(self.encoded)
+
+    def values(self, field):
+        return sorted(label for label, _, _ in self.postings[field].values())
+
+    def query(self, bbox=None, min_days=None, max_days=None, agency=None, program=None):
+        """sorted row ids matching every given filter
+
+        The sorted indexes give the size of every attribute filter's match set
+        in O(log n); the smallest of those (or the tree's bbox hits) becomes the
+        candidate list, and the remaining filters are checked as vectorized
+        column tests on just those candidates.
+        """
+        import numpy as np
+        import shapely
+
+        options = []                      # (size, fetch candidate ids)
+        days_filter = min_days is not None or max_days is not None
+        if days_filter:
+            lo = 0 if min_days is None else int(np.searchsorted(self.days_sorted, min_days, "left"))
+            hi = len(self.days_sorted) if max_days is None else \
+                int(np.searchsorted(self.days_sorted, max_days, "right"))
+            options.append((hi - lo, lambda: np.sort(self.days_ids[lo:hi])))
+        wanted_codes = {}
+        for field, wanted in (("agency", agency), ("program", program)):
+            if wanted:
+                hits = [self.postings[field][w.casefold()] for w in wanted
+                        if w.casefold() in self.postings[field]]
+                wanted_codes[field] = np.array([code for _, code, _ in hits], dtype=np.int32)
+                postings = [ids for _, _, ids in hits]
+                options.append((sum(map(len, postings)),
+                                lambda p=postings: np.sort(np.concatenate(p)) if p
+                                else np.empty(0, np.int64)))
+
+        box = shapely.box(*bbox) if bbox is not None else None
+        size, fetch = min(options, key=lambda o: o[0]) if options else (len(self), None)
+        if box is not None and size >= SCAN_CUTOFF:
+            ids = np.sort(self.tree.query(box, predicate="intersects"))
+        else:
+            ids = fetch() if fetch else np.arange(len(self))
+            if box is not None:
+                ids = ids[shapely.intersects(self.geoms[ids], box)]
+
+        keep = np.ones(len(ids), dtype=bool)
+        if days_filter:
+            d = self.days[ids]
+            keep &= ~np.isnan(d)
+            if min_days is not None:
+                keep &= d >= min_days
+            if max_days is not None:
+                keep &= d <= max_days
+        for field, codes in wanted_codes.items():
+            keep &= np.isin(self.codes[field][ids], codes)
+        return ids[keep]
+
+
+def pick_source(paths):
+    """the first existing path not older than any later existing one, else None
+
+    blm_projects_with_plans.csv is derived from blm_projects_with_coords.csv; when
+    the plan assignment didn't run after the last coords join it is stale and the
+    fresher fallback is served instead.
+    """
+    existing = [p for p in paths if p.exists()]
+    for i, path in enumerate(existing):
+        if all(path.stat().st_mtime >= later.stat().st_mtime for later in existing[i + 1:]):
+            return path
+    return None
+
+
+def load_layers(names, today=None):
+    today = today or dt.date.today()
+    layers = {}
+    for name in names:
+        paths, reader = SOURCES[name]
+        path = pick_source(paths)
+        if path is None:
+            print(f"[WARN] {name}: {paths[-1]} missing – skipped")
+            continue
+        t0 = time.perf_counter()
+        with metrics.span("index", layer=name):
+            layers[name] = LayerIndex(list(reader(path, today)))
+        print(f"[INFO] {name}: {len(layers[name])} features indexed "
+              f"in {time.perf_counter() - t0:.2f}s")
+    return layers
+
+
+def parse_list(qs, key):
+    raw = ",".join(qs.get(key, []))
+    return [v.strip() for v in raw.split(",") if v.strip()] or None
+
+
+def parse_number(qs, key, cast=float):
+    return cast(qs[key][0]) if key in qs and qs[key][0] != "" else None
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    layers: dict = {}             # read-only after startup, shared by all threads
+
+    def send(self, status, payload):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Content-Type", "application/geo+json" if status == 200 else "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        qs = parse_qs(url.query)
+        if url.path == "/layers":
+            return self.send(200, {"layers": {
+                name: {"features": len(idx), "agency": idx.values("agency"),
+                       "program": idx.values("program")}
+                for name, idx in self.layers.items()}})
+        if url.path != "/features":
+            return self.send(404, {"error": "not found"})
+        try:
+            with metrics.span("query", query=url.query) as s:
+                body = self.features(qs)
+                s["bytes"] = len(body)
+            metrics.count("bytes.sent", len(body))
+            return self.send(200, body)
+        except (ValueError, KeyError) as exc:
+            metrics.count("queries.rejected")
+            return self.send(400, {"error": str(exc)})
+
+    def features(self, qs):
+        t0 = time.perf_counter()
+        names = parse_list(qs, "layer") or list(self.layers)
+        unknown = [n for n in names if n not in self.layers]
+        if unknown:
+            raise KeyError(f"unknown layer(s): {', '.join(unknown)}")
+        bbox = parse_list(qs, "bbox")
+        if bbox is not None:
+            bbox = [float(v) for v in bbox]
+            if len(bbox) != 4:
+                raise ValueError("bbox must be west,south,east,north")
+        limit = min(parse_number(qs, "limit", int) or PAGE_SIZE, MAX_PAGE_SIZE)
+        offset = parse_number(qs, "offset", int) or 0
+        if limit < 1 or offset < 0:
+            raise ValueError("limit must be ≥ 1 and offset ≥ 0")
+
+        filters = dict(bbox=bbox, min_days=parse_number(qs, "min_days"),
+                       max_days=parse_number(qs, "max_days"),
+                       agency=parse_list(qs, "agency"), program=parse_list(qs, "program"))
+        matches = [(self.layers[n], self.layers[n].query(**filters)) for n in names]
+        total = sum(len(ids) for _, ids in matches)
+
+        # page across the layers in request order
+        page, skip = [], offset
+        for idx, ids in matches:
+            if skip >= len(ids):
+                skip -= len(ids)
+                continue
+            for i in ids[skip:skip + limit - len(page)]:
+                page.append(idx.encoded[i])
+            skip = 0
+            if len(page) == limit:
+                break
+
+        end = offset + len(page)
+        head = json.dumps({"type": "FeatureCollection", "numberMatched": total,
+                           "numberReturned": len(page), "next": end if end < total else None,
+                           "took_ms": round((time.perf_counter() - t0) * 1000, 2)})
+        return head[:-1].encode() + b',"features":[' + b",".join(page) + b"]}"
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve bbox/attribute queries over the processed layers.")
+    ap.add_argument("--port", type=int, default=PORT)
+    ap.add_argument("--layers", nargs="+", choices=list(SOURCES), default=list(SOURCES))
+    metrics.add_metrics_args(ap)
+    args = ap.parse_args()
+
+    with metrics.run("query_server", args):
+        QueryHandler.layers = load_layers(args.layers)
+        server = ThreadingHTTPServer(("127.0.0.1", args.port), QueryHandler)
+        print(f"[INFO] query server on http://localhost:{args.port}/features")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass                  # Ctrl-C: the metrics run record is still written
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+rest_client.py
+──────────────
+Shared HTTP client for the fetch_* scripts (Federal Register API and the
+ArcGIS REST query endpoints).
+
+* one pooled requests.Session with retry/backoff on 429/5xx; once retries
+  run out a read timeout raises requests.ReadTimeout and a 5xx answer raises
+  requests.HTTPError from parse_json (urllib3 would otherwise wrap both in
+  ConnectionError / RetryError)
+* content-addressed disk cache: bodies are stored once under their sha256,
+  an SQLite index maps request → body, ETag, Last-Modified and timestamps
+* fresh entries (younger than the TTL) are served without a request; stale
+  ones are revalidated with If-None-Match / If-Modified-Since
+* the cache is trimmed least-recently-used first once it exceeds max_bytes
+* offline mode serves everything from the cache and never touches the network
+* every request is a metrics "http" span (status, bytes, cache hit/miss,
+  retries) and every decode a "parse" span
+
+    client = RestClient.from_args(args)        # after add_client_args(ap)
+    data = client.get_json(url, params=...)
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.retry import Retry
+
+import metrics
+
+CACHE_DIR = Path(os.environ.get("ONX_CACHE_DIR", "data/.http_cache"))
+CACHE_TTL = 6 * 3600                 # seconds before an entry is revalidated
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+TIMEOUT = 60
+RETRIES = 4
+BACKOFF = 1.0
+
+
+class CacheMiss(Exception):
+    """Offline mode and the request was never cached."""
+
+
+class ArcGISError(RuntimeError):
+    """An ArcGIS endpoint answered HTTP 200 with an {"error": …} body."""
+
+
+def is_error_body(content):
+    """cheap check for an ArcGIS {"error": …} payload, so it is never written to the cache"""
+    return content[:64].lstrip().replace(b" ", b"").startswith(b'{"error"')
+
+
+class CachedResponse:
+    def __init__(self, url, status_code, content, from_cache, cache_key=None):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.from_cache = from_cache
+        self.cache_key = cache_key
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} for {self.url}", response=self)
+
+
+class DiskCache:
+    def __init__(self, root, max_bytes=CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.bodies = self.root / "bodies"
+        self.bodies.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.root / "index.sqlite", check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY, url TEXT, body TEXT NOT NULL, size INTEGER NOT NULL,"
+            " etag TEXT, last_modified TEXT, fetched_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+
+    def get(self, key):
+        """(content, etag, last_modified, fetched_at) or None"""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT body, etag, last_modified, fetched_at FROM entries WHERE key = ?",
+                (key,)).fetchone()
+            if row is None:
+                return None
+            # read under the lock: evict() may otherwise unlink the body in between
+            try:
+                content = (self.bodies / row[0]).read_bytes()
+            except FileNotFoundError:
+                self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.db.commit()
+                return None
+            self.db.execute("UPDATE entries SET used_at = ? WHERE key = ?", (time.time(), key))
+            self.db.commit()
+        return content, row[1], row[2], row[3]
+
+    def put(self, key, url, content, etag, last_modified):
+        digest = hashlib.sha256(content).hexdigest()
+        path = self.bodies / digest
+        if not path.exists():
+            tmp = path.with_suffix(f".{threading.get_ident()}.part")
+            tmp.write_bytes(content)
+            os.replace(tmp, path)
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, url, digest, len(content), etag, last_modified, now, now))
+            self.db.commit()
+        self.evict()
+
+    def touch(self, key):
+        """a 304 revalidated the entry: restart its TTL"""
+        with self.lock:
+            now = time.time()
+            self.db.execute("UPDATE entries SET fetched_at = ?, used_at = ? WHERE key = ?",
+                            (now, now, key))
+            self.db.commit()
+
+    def forget(self, key):
+        """drop the entry, and its body file unless another entry shares it"""
+        with self.lock:
+            row = self.db.execute("SELECT body FROM entries WHERE key = ?", (key,)).fetchone()
+            self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            if row and not self.db.execute(
+                    "SELECT 1 FROM entries WHERE body = ? LIMIT 1", (row[0],)).fetchone():
+                (self.bodies / row[0]).unlink(missing_ok=True)
+            self.db.commit()
+
+    def evict(self):
+        """drop least-recently-used entries until the distinct bodies fit in max_bytes"""
+        with self.lock:
+            total = self.db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT body, size FROM entries)"
+            ).fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            for key, body, size in self.db.execute(
+                    "SELECT key, body, size FROM entries ORDER BY used_at").fetchall():
+                self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                still_used = self.db.execute(
+                    "SELECT 1 FROM entries WHERE body = ? LIMIT 1", (body,)).fetchone()
+                if not still_used:
+                    (self.bodies / body).unlink(missing_ok=True)
+                    total -= size
+                if total <= self.max_bytes:
+                    break
+            self.db.commit()
+
+
+class RestClient:
+    def __init__(self, cache_dir=CACHE_DIR, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES,
+                 offline=False, use_cache=True, pool_size=8, timeout=TIMEOUT, read_retries=RETRIES):
+        self.ttl = ttl
+        self.offline = offline
+        self.timeout = timeout
+        self.cache = DiskCache(cache_dir, max_bytes) if use_cache or offline else None
+
+        # raise_on_status=False: the last 5xx comes back as a response, not a RetryError
+        retry = Retry(total=RETRIES, read=read_retries, backoff_factor=BACKOFF,
+                      status_forcelist=(429, 500, 502, 503, 504), allowed_methods=None,
+                      raise_on_status=False)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @classmethod
+    def from_args(cls, args, **kwargs):
+        return cls(cache_dir=args.cache_dir, ttl=args.cache_ttl, offline=args.offline,
+                   use_cache=not args.no_cache, **kwargs)
+
+    def request(self, method, url, params=None, data=None):
+        prepared = self.session.prepare_request(
+            requests.Request(method, url, params=params, data=data))
+        body = prepared.body or b""
+        if isinstance(body, str):
+            body = body.encode()
+        key = hashlib.sha256(f"{method} {prepared.url}\n".encode() + body).hexdigest()
+
+        with metrics.span("http", method=method, url=url) as s:
+            resp = self._send(prepared, key, s)
+            s.update(status=resp.status_code, bytes=len(resp.content))
+        metrics.count("http.requests")
+        metrics.count(f"cache.{s['cache']}")
+        return resp
+
+    def _send(self, prepared, key, s):
+        entry = self.cache.get(key) if self.cache else None
+        s["cache"] = "hit"
+        if self.offline:
+            if entry is None:
+                raise CacheMiss(f"not cached (offline): {prepared.url}")
+            return CachedResponse(prepared.url, 200, entry[0], True, key)
+        if entry and time.time() - entry[3] < self.ttl:
+            return CachedResponse(prepared.url, 200, entry[0], True, key)
+
+        if entry and entry[1]:
+            prepared.headers["If-None-Match"] = entry[1]
+        if entry and entry[2]:
+            prepared.headers["If-Modified-Since"] = entry[2]
+
+        try:
+            resp = self.session.send(prepared, timeout=self.timeout)
+        except requests.ConnectionError as e:
+            reason = getattr(e.args[0] if e.args else None, "reason", None)
+            if isinstance(reason, ReadTimeoutError):
+                raise requests.ReadTimeout(reason, request=prepared) from e
+            raise
+        retries = len(getattr(getattr(resp.raw, "retries", None), "history", None) or ())
+        if retries:
+            s["retries"] = retries
+            metrics.count("http.retries", retries)
+        if resp.status_code == 304 and entry:
+            s["cache"] = "revalidated"
+            self.cache.touch(key)
+            return CachedResponse(prepared.url, 200, entry[0], True, key)
+        s["cache"] = "miss" if self.cache else "off"
+        metrics.count("http.bytes", len(resp.content))
+        if resp.status_code == 200 and self.cache and not is_error_body(resp.content):
+            self.cache.put(key, prepared.url, resp.content,
+                           resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+        return CachedResponse(prepared.url, resp.status_code, resp.content, False, key)
+
+    def get(self, url, params=None):
+        return self.request("GET", url, params=params)
+
+    def post(self, url, data=None):
+        return self.request("POST", url, data=data)
+
+    def get_json(self, url, params=None):
+        return self.parse_json(self.get(url, params))
+
+    def post_json(self, url, data=None):
+        return self.parse_json(self.post(url, data))
+
+    def parse_json(self, resp):
+        """decoded body; raises on HTTP errors and on ArcGIS {"error": …} payloads"""
+        resp.raise_for_status()
+        with metrics.span("parse", bytes=len(resp.content)):
+            payload = resp.json()
+        if isinstance(payload, dict) and "error" in payload:
+            # never replay an error body from the cache
+            if self.cache and not resp.from_cache:
+                self.cache.forget(resp.cache_key)
+            raise ArcGISError(payload["error"])
+        return payload
+
+
+def add_client_args(ap):
+    """the cache / offline flags shared by every fetch_* script"""
+    g = ap.add_argument_group("http cache")
+    g.add_argument("--offline", action="store_true",
+                   default=os.environ.get("ONX_OFFLINE") == "1",
+                   help="serve every request from the cache, never touch the network")
+    g.add_argument("--no-cache", action="store_true", help="bypass the response cache")
+    g.add_argument("--cache-dir", type=Path, default=CACHE_DIR)
+    g.add_argument("--cache-ttl", type=float, default=CACHE_TTL,
+                   help="seconds before a cached response is revalidated")
+    return ap
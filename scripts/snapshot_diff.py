@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+snapshot_diff.py
+────────────────
+Compare the freshly built data against the previous snapshot and write the
+difference as a compact changeset, so the map, the tile build and alerts can
+apply deltas instead of reloading whole layers.
+
+  data/changes/latest.ndjson – one JSON object per line:
+    {"dataset": "fr-notices", "op": "add"|"change"|"remove", "key": "2025-14846",
+     "record": {...new row / feature...}, "fields": ["days_left", ...]}
+    {"dataset": "fr-notices", "op": "summary", "added": 1, "changed": 2, "removed": 0, "unchanged": 40}
+
+Records are keyed by NEPA # (BLM projects), document_number (FR notices) or
+FORESTNAME (merged forest features).  Countdown fields (days_left, a numeric
+"Days Left") tick every day, so they are left out of the change hash: a record
+only counts as changed when something persistent – e.g. comments_close_on –
+does.  Inputs are read one row / feature at a
+time and compared inside SQLite (data/snapshots.sqlite), so memory stays flat
+however large the snapshots grow.  The new data becomes the snapshot once the
+changeset is written.
+
+USAGE (from project root)
+  python scripts/snapshot_diff.py [--datasets fr-notices ...] [--baseline] [--dry-run]
+"""
+import argparse, csv, hashlib, json, pathlib, sqlite3, time
+from itertools import islice
+
+import metrics
+from geojson_stream import read_features
+
+SNAPSHOT_DB = pathlib.Path("data/snapshots.sqlite")
+CHANGESET = pathlib.Path("data/changes/latest.ndjson")
+BATCH = 5000
+
+DATASETS = {
+    "blm-projects": {"path": "data/raw/blm_active_projects.csv", "key": "NEPA #",
+                     "volatile": ["Days Left"]},
+    "fr-notices": {"path": "data/raw/usfs_open_comments.csv", "key": "document_number",
+                   "volatile": ["days_left"]},
+    "usfs-merged": {"path": "data/processed/usfs_merged.geojson", "key": "FORESTNAME",
+                    "volatile": ["days_left"]},
+}
+
+
+def is_countdown(value):
+    """a relative day count (22, "22", 22.0) rather than a date"""
+    if isinstance(value, (int, float)):
+        return True
+    try:
+        float(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def stable_view(record, volatile):
+    """the record without countdown values – what the change hash covers"""
+    if not volatile:
+        return record
+    if "properties" in record:
+        props = record.get("properties") or {}
+        return {**record, "properties": {k: v for k, v in props.items()
+                                         if not (k in volatile and is_countdown(v))}}
+    # ePlanning's "Days Left" is sometimes a close date: only numeric counts are dropped
+    return {k: v for k, v in record.items() if not (k in volatile and is_countdown(v))}
+
+
+def iter_records(path, key_field):
+    """(key, record) pairs; CSV rows as dicts, GeoJSON features as-is"""
+    path = pathlib.Path(path)
+    if path.suffix.lower() == ".csv":
+        with open(path, newline="", encoding="utf-8-sig") as fh:
+            for row in csv.DictReader(fh):
+                row = {k.strip(): v for k, v in row.items() if k}
+                yield (row.get(key_field) or "").strip(), row
+    else:
+        for feature in read_features(path):
+            yield str((feature.get("properties") or {}).get(key_field) or "").strip(), feature
+
+
+def changed_fields(old, new):
+    """top-level columns (CSV) or properties + 'geometry' (features) that differ"""
+    if "properties" in new or "properties" in old:
+        a, b = old.get("properties") or {}, new.get("properties") or {}
+        fields = [k for k in dict.fromkeys([*a, *b]) if a.get(k) != b.get(k)]
+        return fields + (["geometry"] if old.get("geometry") != new.get("geometry") else [])
+    return [k for k in dict.fromkeys([*old, *new]) if old.get(k) != new.get(k)]
+
+
+def open_db(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(path)
+    db.executescript("""
+        CREATE TABLE IF NOT EXISTS snapshot (dataset TEXT, key TEXT, hash TEXT, record TEXT,
+                                             PRIMARY KEY (dataset, key));
+        CREATE TABLE IF NOT EXISTS snapshot_meta (dataset TEXT PRIMARY KEY, source TEXT,
+                                                  taken_at TEXT, records INTEGER);
+    """)
+    return db
+
+
+def load_incoming(db, table, records, volatile=()):
+    """stream (key, record) pairs into a temp table; returns (rows, blank keys, duplicate keys)"""
+    db.execute(f"DROP TABLE IF EXISTS {table}")
+    db.execute(f"CREATE TEMP TABLE {table} (key TEXT PRIMARY KEY, hash TEXT, record TEXT)")
+    rows = blank = 0
+
+    def encoded():
+        nonlocal rows, blank
+        for key, record in records:
+            if not key:
+                blank += 1
+                continue
+            rows += 1
+            text = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+            stable = json.dumps(stable_view(record, volatile), ensure_ascii=False, separators=(",", ":"))
+            yield key, hashlib.sha1(stable.encode()).hexdigest(), text
+
+    it = encoded()
+    while batch := list(islice(it, BATCH)):
+        db.executemany(f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?)", batch)   # last one wins
+    unique = db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    return unique, blank, rows - unique
+
+
+def diff_dataset(db, name, table, out, emit=True, volatile=()):
+    """write add/change/remove lines for `name`; returns the summary counts"""
+    counts = {"added": 0, "changed": 0, "removed": 0, "unchanged": 0}
+
+    def line(obj):
+        out.write(json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    added = db.execute(f"""SELECT i.key, i.record FROM {table} i
+                          LEFT JOIN snapshot s ON s.dataset = ? AND s.key = i.key
+                          WHERE s.key IS NULL ORDER BY i.key""", (name,))
+    for key, record in added:
+        counts["added"] += 1
+        if emit:
+            line({"dataset": name, "op": "add", "key": key, "record": json.loads(record)})
+
+    changed = db.execute(f"""SELECT i.key, s.record, i.record FROM {table} i
+                            JOIN snapshot s ON s.dataset = ? AND s.key = i.key
+                            WHERE s.hash != i.hash ORDER BY i.key""", (name,))
+    for key, old, new in changed:
+        counts["changed"] += 1
+        if emit:
+            new = json.loads(new)
+            fields = changed_fields(stable_view(json.loads(old), volatile), stable_view(new, volatile))
+            line({"dataset": name, "op": "change", "key": key, "record": new, "fields": fields})
+
+    removed = db.execute(f"""SELECT s.key FROM snapshot s
+                            WHERE s.dataset = ? AND NOT EXISTS
+                                  (SELECT 1 FROM {table} i WHERE i.key = s.key)
+                            ORDER BY s.key""", (name,))
+    for (key,) in removed:
+        counts["removed"] += 1
+        if emit:
+            line({"dataset": name, "op": "remove", "key": key})
+
+    counts["unchanged"] = db.execute(f"""SELECT COUNT(*) FROM {table} i JOIN snapshot s
+                                        ON s.dataset = ? AND s.key = i.key
+                                        WHERE s.hash = i.hash""", (name,)).fetchone()[0]
+    line({"dataset": name, "op": "summary", **counts})
+    return counts
+
+
+def commit_snapshot(db, name, table, source, records):
+    with db:
+        db.execute("DELETE FROM snapshot WHERE dataset = ?", (name,))
+        db.execute(f"INSERT INTO snapshot SELECT ?, key, hash, record FROM {table}", (name,))
+        db.execute("INSERT OR REPLACE INTO snapshot_meta VALUES (?, ?, ?, ?)",
+                   (name, str(source), time.strftime("%Y-%m-%dT%H:%M:%S"), records))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Diff new pipeline outputs against the last snapshot.")
+    ap.add_argument("--datasets", nargs="+", choices=list(DATASETS), default=list(DATASETS))
+    ap.add_argument("--db", type=pathlib.Path, default=SNAPSHOT_DB)
+    ap.add_argument("-o", "--out", type=pathlib.Path, default=CHANGESET)
+    ap.add_argument("--baseline", action="store_true",
+                    help="record the snapshot without emitting the records as additions")
+    ap.add_argument("--dry-run", action="store_true", help="write the changeset, keep the old snapshot")
+    metrics.add_metrics_args(ap)
+    args = ap.parse_args()
+
+    with metrics.run("snapshot_diff", args):
+        db = open_db(args.db)
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        tmp = args.out.with_name(args.out.name + ".part")
+        loaded = []
+        with tmp.open("w", encoding="utf-8") as out:
+            for i, name in enumerate(args.datasets):
+                spec, table = DATASETS[name], f"incoming_{i}"
+                if not pathlib.Path(spec["path"]).exists():
+                    print(f"[WARN] {name}: {spec['path']} missing – snapshot kept")
+                    continue
+                with metrics.span("load", dataset=name):
+                    rows, blank, dupes = load_incoming(db, table, iter_records(spec["path"], spec["key"]),
+                                                       spec.get("volatile", ()))
+                with metrics.span("diff", dataset=name):
+                    counts = diff_dataset(db, name, table, out, emit=not args.baseline,
+                                          volatile=spec.get("volatile", ()))
+                for op, n in counts.items():
+                    metrics.count(f"records.{op}", n)
+                loaded.append((name, table, spec["path"], rows))
+                extra = (f", {blank} without {spec['key']}" if blank else "") + \
+                        (f", {dupes} duplicate keys" if dupes else "")
+                print(f"[INFO] {name}: +{counts['added']} ~{counts['changed']} -{counts['removed']} "
+                      f"({counts['unchanged']} unchanged{extra})")
+        tmp.replace(args.out)
+        if not args.dry_run:
+            # the snapshot only moves on once the changeset describing the move exists
+            for name, table, source, rows in loaded:
+                with metrics.span("commit", dataset=name, rows=rows):
+                    commit_snapshot(db, name, table, source, rows)
+        db.close()
+        print(f"[DONE] changeset → {args.out}")
+
+if __name__ == "__main__":
+    main()
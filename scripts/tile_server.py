@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+tile_server.py
+──────────────
+Tiny local server for the MBTiles archive written by build_tiles.py.
+
+  GET /tiles.json              TileJSON (bounds, zooms, tile URL template)
+  GET /tiles/{z}/{x}/{y}.pbf   gzipped Mapbox vector tile (204 if empty)
+
+USAGE (from project root)
+  python scripts/tile_server.py [--port 8089] [--mbtiles data/web/onx.mbtiles]
+"""
+import argparse, json, pathlib, re, sqlite3, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import metrics
+from build_tiles import MBTILES
+
+PORT = 8089
+TILE_PATH = re.compile(r"^/tiles/(\d+)/(\d+)/(\d+)\.pbf$")
+
+
+class TileHandler(BaseHTTPRequestHandler):
+    mbtiles: pathlib.Path = MBTILES
+    local = threading.local()        # one read-only sqlite connection per thread
+
+    def db(self):
+        if not hasattr(self.local, "conn"):
+            self.local.conn = sqlite3.connect(f"file:{self.mbtiles}?mode=ro", uri=True)
+        return self.local.conn
+
+    def send(self, status, body=b"", content_type=None, gzipped=False):
+        self.send_response(status)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/tiles.json":
+            return self.send(200, json.dumps(self.tilejson()).encode(), "application/json")
+        m = TILE_PATH.match(path)
+        if not m:
+            return self.send(404)
+        z, x, y = map(int, m.groups())
+        with metrics.span("tile", z=z, x=x, y=y) as s:
+            row = self.db().execute(
+                "SELECT tile_data FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+                (z, x, (1 << z) - 1 - y)).fetchone()
+            s["bytes"] = len(row[0]) if row else 0
+        metrics.count("tiles.served" if row else "tiles.empty")
+        if row is None:
+            return self.send(204)
+        metrics.count("bytes.sent", len(row[0]))
+        self.send(200, row[0], "application/x-protobuf", gzipped=True)
+
+    def tilejson(self):
+        meta = dict(self.db().execute("SELECT name, value FROM metadata"))
+        host = self.headers.get("Host", f"localhost:{PORT}")
+        return {
+            "tilejson": "2.2.0",
+            "tiles": [f"http://{host}/tiles/{{z}}/{{x}}/{{y}}.pbf"],
+            "minzoom": int(meta.get("minzoom", 0)),
+            "maxzoom": int(meta.get("maxzoom", 14)),
+            "bounds": [float(v) for v in meta.get("bounds", "-180,-85,180,85").split(",")],
+            "vector_layers": json.loads(meta.get("json", "{}")).get("vector_layers", []),
+        }
+
+    def log_message(self, fmt, *args):
+        pass                            # quiet: one line per tile is noise
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve vector tiles from an MBTiles file.")
+    ap.add_argument("--mbtiles", type=pathlib.Path, default=MBTILES)
+    ap.add_argument("--port", type=int, default=PORT)
+    metrics.add_metrics_args(ap)
+    args = ap.parse_args()
+
+    TileHandler.mbtiles = args.mbtiles
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), TileHandler)
+    print(f"[INFO] serving {args.mbtiles} on http://localhost:{args.port}/tiles.json")
+    with metrics.run("tile_server", args):
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass                  # Ctrl-C: the metrics run record is still written
+
+if __name__ == "__main__":
+    main()
@@ -3,53 +3,136 @@
 merge_forest_centroids_into_comments.py
 ───────────────────────────────────────
 Add lat/lon coordinates to each row in the USFS comments CSV based on forest centroid matches.
+
+A notice naming several forests ("A National Forest; B National Forest") gets
+the mean of their centroids, or with --weighted the area-weighted centroid of
+the union of their polygons.  The join is explode → merge → groupby, so it
+scales with the number of (notice, forest) pairs rather than Python loops.
+
+Inputs and output may be CSV/GeoJSON or Parquet/GeoParquet (see columnar.py);
+the defaults are the columnar intermediates, read with column projection.
 """
 
-import pandas as pd
+import argparse
+import ast
+import re
+
+import metrics
+from columnar import read_layer, read_table, write_table
 
 # Paths
 COMMENTS_CSV = "data/outputs/usfs_open_comments_2025-08-07.csv"
-CENTROIDS_CSV = "data/processed/usfs_selected_forests.csv"
-OUTPUT_CSV = "data/processed/usfs_comments_with_coords.csv"
-
-# Load files
-comments_df = pd.read_csv(COMMENTS_CSV)
-centroids_df = pd.read_csv(CENTROIDS_CSV)
-
-# Normalize names
-comments_df.columns = comments_df.columns.str.strip()
-centroids_df.columns = centroids_df.columns.str.strip()
-comments_df["admin unit"] = comments_df["admin unit"].astype(str).str.strip()
-centroids_df["FORESTNAME"] = centroids_df["FORESTNAME"].astype(str).str.strip()
-
-# Create lookup dictionary of centroids
-centroid_lookup = centroids_df.set_index("FORESTNAME")[["lon", "lat"]].to_dict("index")
-
-# Prepare lists for coordinates
-lons = []
-lats = []
-
-for admin_unit in comments_df["admin unit"]:
-    # Split by comma if there are multiple forests
-    forests = [f.strip() for f in admin_unit.split(",")]
-
-    # Average coordinates of all matching forests
-    matched_coords = [centroid_lookup.get(f) for f in forests if f in centroid_lookup]
-
-    if matched_coords:
-        avg_lon = sum(c["lon"] for c in matched_coords) / len(matched_coords)
-        avg_lat = sum(c["lat"] for c in matched_coords) / len(matched_coords)
-    else:
-        avg_lon = None
-        avg_lat = None
-
-    lons.append(avg_lon)
-    lats.append(avg_lat)
-
-# Add columns
-comments_df["lon"] = lons
-comments_df["lat"] = lats
-
-# Save
-comments_df.to_csv(OUTPUT_CSV, index=False)
-print(f"✅ Saved enriched comments → {OUTPUT_CSV}")
+CENTROIDS = "data/processed/usfs_forest_centroids.parquet"
+FORESTS = "data/processed/usfs_selected_forests.parquet"
+OUTPUT = "data/processed/usfs_comments_with_coords.parquet"
+
+DELIMITERS = ";"
+EQUAL_AREA_CRS = 5070      # CONUS Albers: areas (and so weights) are meaningful
+
+
+def explode_units(comments_df, delimiters=DELIMITERS):
+    """one row per (notice row, forest) with a case-insensitive join key"""
+    import pandas as pd
+
+    pattern = "[" + re.escape(delimiters) + "]"
+    units = (comments_df["admin unit"].fillna("").astype(str)
+             .str.split(pattern, regex=True)
+             .explode()
+             .str.strip())
+    units = units[units.ne("") & units.ne("nan")]
+    return pd.DataFrame({"row": units.index, "key": units.str.casefold().values})
+
+
+def mean_centroids(pairs, centroids_df):
+    """plain average of the matched forests' centroids, per notice row"""
+    centroids = centroids_df[["FORESTNAME", "lon", "lat"]].assign(
+        key=centroids_df["FORESTNAME"].astype(str).str.strip().str.casefold()
+    ).drop_duplicates("key")
+    merged = pairs.merge(centroids[["key", "lon", "lat"]], on="key", how="inner")
+    return merged.groupby("row")[["lon", "lat"]].mean()
+
+
+def weighted_centroids(pairs, forests_path):
+    """centroid of the union of each notice's forest polygons, in an equal-area CRS"""
+    import pandas as pd
+
+    forests = read_layer(forests_path, columns=["FORESTNAME"])
+    with metrics.span("reproject", rows=len(forests), crs=EQUAL_AREA_CRS):
+        forests = forests.to_crs(EQUAL_AREA_CRS)
+    forests["key"] = forests["FORESTNAME"].astype(str).str.strip().str.casefold()
+    forests = forests.drop_duplicates("key").drop(columns="FORESTNAME")
+
+    matched = forests.merge(pairs, on="key", how="inner")
+    if matched.empty:
+        return pd.DataFrame(columns=["lon", "lat"])
+    with metrics.span("dissolve", rows=len(matched)):
+        union = matched[["row", "geometry"]].dissolve(by="row")
+    with metrics.span("reproject", rows=len(union), crs=4326):
+        points = union.geometry.centroid.to_crs(4326)
+    return pd.DataFrame({"lon": points.x, "lat": points.y}, index=union.index)
+
+
+def unit_list(value):
+    """admin_units cell → list of forest names: a list/array from Parquet, or the
+    "['A', 'B']" text pandas writes for a list in CSV"""
+    if isinstance(value, str):
+        value = value.strip()
+        if not value.startswith("["):
+            return [value] if value else []
+        try:
+            value = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return [value]
+    if value is None or isinstance(value, float):
+        return []                          # NaN: empty CSV cell
+    return [str(v) for v in value]
+
+
+def join_coords(comments_df, centroids_df, delimiters=DELIMITERS, forests_path=None):
+    comments_df = comments_df.reset_index(drop=True)
+    comments_df.columns = comments_df.columns.str.strip()
+    comments_df = comments_df.drop(columns=["lon", "lat"], errors="ignore")
+    if "admin unit" not in comments_df and "admin_units" in comments_df:
+        # match_admin_units.py output: a list of forests per notice
+        comments_df["admin unit"] = comments_df["admin_units"].map(
+            lambda v: f"{delimiters[0]} ".join(unit_list(v)))
+    centroids_df.columns = centroids_df.columns.str.strip()
+
+    with metrics.span("join", rows=len(comments_df)):
+        pairs = explode_units(comments_df, delimiters)
+        coords = mean_centroids(pairs, centroids_df)
+    if forests_path:
+        # forests without a polygon fall back to the plain centroid mean
+        coords = weighted_centroids(pairs, forests_path).combine_first(coords)
+    return comments_df.join(coords[["lon", "lat"]])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Add forest-centroid coordinates to USFS notices.")
+    ap.add_argument("--comments", default=COMMENTS_CSV)
+    ap.add_argument("--centroids", default=CENTROIDS)
+    ap.add_argument("-o", "--out", default=OUTPUT)
+    ap.add_argument("--delimiters", default=DELIMITERS,
+                    help="characters separating forests in 'admin unit' (default ';')")
+    ap.add_argument("--weighted", action="store_true",
+                    help="area-weighted centroid of the union of the matched forest polygons")
+    ap.add_argument("--forests", default=FORESTS, help="forest polygons for --weighted")
+    metrics.add_metrics_args(ap)
+    args = ap.parse_args()
+
+    with metrics.run("usfs_join_geom", args):
+        # Load files
+        comments_df = read_table(args.comments, schema="fr_notices")
+        centroids_df = read_table(args.centroids, columns=["FORESTNAME", "lon", "lat"],
+                                  schema="forest_centroids")
+
+        out = join_coords(comments_df, centroids_df, args.delimiters,
+                          args.forests if args.weighted else None)
+
+        # Save
+        out = write_table(out, args.out, schema="fr_notices")
+        print(f"✅ Saved enriched comments → {args.out} "
+              f"({out['lat'].notna().sum()}/{len(out)} rows located)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+test_fetch_split.py
+───────────────────
+fetch_fs_planning_units.py halves a chunk the server is too slow on or fails
+on (5xx), against a local endpoint that only answers small chunks.
+
+USAGE (from project root)
+  python -m pytest tests
+"""
+import json, pathlib, sys, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "scripts"))
+import fetch_fs_planning_units as fs   # noqa: E402
+import rest_client                     # noqa: E402
+
+MAX_IDS = 2              # larger chunks are "too heavy" for the endpoint
+TIMEOUT = 0.3
+
+
+class HeavyChunkHandler(BaseHTTPRequestHandler):
+    mode = "slow"        # "slow": sleep past the client timeout, "error": HTTP 500
+
+    def do_POST(self):
+        q = parse_qs(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode())
+        ids = [int(i) for i in q["objectIds"][-1].split(",")]
+        if len(ids) > MAX_IDS and self.mode == "slow":
+            time.sleep(TIMEOUT * 3)
+        status = 500 if len(ids) > MAX_IDS and self.mode == "error" else 200
+        feats = [{"type": "Feature", "id": i, "properties": {"OBJECTID": i}, "geometry": None}
+                 for i in ids] if status == 200 else []
+        payload = json.dumps({"type": "FeatureCollection", "features": feats}).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            pass             # the client gave up on a slow chunk
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+@pytest.fixture
+def endpoint(request, monkeypatch):
+    handler = type("Handler", (HeavyChunkHandler,), {"mode": request.param})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(fs, "BASE_URL", f"http://127.0.0.1:{server.server_port}/fs/MapServer/0")
+    monkeypatch.setattr(rest_client, "BACKOFF", 0)
+    yield
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("endpoint", ["slow", "error"], indirect=True)
+def test_heavy_chunk_is_split(endpoint):
+    client = rest_client.RestClient(use_cache=False, timeout=TIMEOUT, read_retries=0)
+    ids = list(range(1, 9))
+    features, nbytes = fs.fetch_chunk_adaptive(client, ids)
+    assert [f["id"] for f in features] == ids
+    assert nbytes > 0
+
+
+@pytest.mark.parametrize("endpoint", ["error"], indirect=True)
+def test_failing_single_id_raises(endpoint, monkeypatch):
+    monkeypatch.setattr(sys.modules[__name__], "MAX_IDS", 0)
+    client = rest_client.RestClient(use_cache=False, timeout=TIMEOUT, read_retries=0)
+    with pytest.raises(rest_client.requests.HTTPError):
+        fs.fetch_chunk_adaptive(client, [1, 2])
@@ -0,0 +1,58 @@
+"""
+test_handoffs.py
+────────────────
+Stage-to-stage handoffs: one script's output file read back by the next, in
+the formats the pipeline actually writes.
+
+USAGE (from project root)
+  python -m pytest tests
+"""
+import csv, pathlib, subprocess, sys
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+
+def script(name, *args):
+    subprocess.run([sys.executable, str(ROOT / "scripts" / name), *map(str, args)],
+                   check=True, capture_output=True, text=True)
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as fh:
+        writer = csv.DictWriter(fh, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as fh:
+        return list(csv.DictReader(fh))
+
+
+def test_match_units_csv_to_usfs_coords_csv(tmp_path):
+    """match_admin_units.py writes admin_units as "['A', 'B']" text in CSV;
+    usfs_join_geom.py must read it back as a list of forests"""
+    notices, forests, centroids = tmp_path / "notices.csv", tmp_path / "forests.csv", tmp_path / "centroids.csv"
+    write_csv(notices, [
+        {"document_number": "1", "title": "Dixie National Forest; Utah; Brian Head", "days_left": "10"},
+        {"document_number": "2", "title": "Malheur and Umatilla National Forests; Plans", "days_left": "20"},
+        {"document_number": "3", "title": "Information Collection", "days_left": "30"},
+    ])
+    write_csv(forests, [{"FORESTNAME": n} for n in
+                        ("Dixie National Forest", "Malheur National Forest", "Umatilla National Forest")])
+    write_csv(centroids, [
+        {"FORESTNAME": "Dixie National Forest", "lon": "-112", "lat": "38"},
+        {"FORESTNAME": "Malheur National Forest", "lon": "-119", "lat": "44"},
+        {"FORESTNAME": "Umatilla National Forest", "lon": "-118", "lat": "46"},
+    ])
+
+    script("match_admin_units.py", notices, forests, tmp_path / "units.csv")
+    script("usfs_join_geom.py", "--comments", tmp_path / "units.csv",
+           "--centroids", centroids, "-o", tmp_path / "coords.csv")
+
+    rows = {r["document_number"]: r for r in read_csv(tmp_path / "coords.csv")}
+    assert rows["1"]["admin unit"] == "Dixie National Forest"
+    assert (float(rows["1"]["lon"]), float(rows["1"]["lat"])) == (-112, 38)
+    assert rows["2"]["admin unit"] == "Malheur National Forest; Umatilla National Forest"
+    assert (float(rows["2"]["lon"]), float(rows["2"]["lat"])) == (-118.5, 45)
+    assert rows["3"]["lon"] == rows["3"]["lat"] == ""